@@ -6,7 +6,7 @@ This script simulates a code review on a mock pull request.
 
 import logging
 import sys
-import yaml
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from galaxy_code_review.bitbucket_api import BitbucketAPI
 from galaxy_code_review.diff_parser import DiffParser
@@ -110,6 +110,16 @@ MOCK_PR_INFO = {
     }
 }
 
+MOCK_DIRECTORY_LISTING = ["example.py"]
+
+MOCK_COMMITS = [
+    {
+        "hash": "abc123",
+        "message": "Initial commit",
+        "date": "2025-05-10T12:00:00Z"
+    }
+]
+
 
 class MockBitbucketAPI(BitbucketAPI):
     """Mock BitbucketAPI for demonstration purposes."""
@@ -124,8 +134,10 @@ class MockBitbucketAPI(BitbucketAPI):
         """Return mock PR info."""
         return MOCK_PR_INFO
     
-    def get_pull_request_diff(self, repo_slug, pr_id):
-        """Return mock diff."""
+    def get_pull_request_diff(self, repo_slug, pr_id, stream=False):
+        """Return mock diff, as an iterator of lines when streaming."""
+        if stream:
+            return iter(MOCK_DIFF.split('\n'))
         return MOCK_DIFF
     
     def get_file_content(self, repo_slug, file_path, ref=None):
@@ -134,23 +146,17 @@ class MockBitbucketAPI(BitbucketAPI):
     
     def list_directory(self, repo_slug, directory_path, ref=None):
         """Return mock directory listing."""
-        return ["example.py"]
+        return MOCK_DIRECTORY_LISTING
     
     def get_file_commits(self, repo_slug, file_path, limit=5):
         """Return mock commits."""
-        return [
-            {
-                "hash": "abc123",
-                "message": "Initial commit",
-                "date": "2025-05-10T12:00:00Z"
-            }
-        ]
+        return MOCK_COMMITS
     
     def post_comment(self, repo_slug, pr_id, comment):
         """Mock posting a comment."""
-        logger.info(f"Would post comment to PR #{pr_id}:")
-        logger.info(f"  Line: {comment.get('inline', {}).get('to', 'N/A')}")
-        logger.info(f"  Content: {comment.get('content', {}).get('raw', '')}")
+        logger.info("Would post comment to PR #%s:", pr_id)
+        logger.info("  Line: %s", comment.get('inline', {}).get('to', 'N/A'))
+        logger.info("  Content: %s", comment.get('content', {}).get('raw', ''))
         return {"id": 456}
 
 
@@ -214,9 +220,9 @@ def main():
     # Parse diff
     changed_files = diff_parser.parse(diff)
     
-    # Process each changed file
-    for file_path, changes in changed_files.items():
-        logger.info(f"Reviewing changes in {file_path}")
+    def _review_one(file_path, changes):
+        """Retrieve context, review and format the comments for one file."""
+        logger.info("Reviewing changes in %s", file_path)
         
         # Get file context
         file_context = context_retriever.get_context(repo_slug, pr_info, file_path)
@@ -225,11 +231,19 @@ def main():
         review_comments = reviewer_agent.review(file_path, changes, file_context)
         
         # Format comments
-        formatted_comments = comment_formatter.format(review_comments)
-        
-        # Post comments
-        for comment in formatted_comments:
-            bitbucket_api.post_comment(repo_slug, pr_id, comment)
+        return comment_formatter.format_list(review_comments)
+    
+    # Review each changed file concurrently, since the work is I/O bound
+    if changed_files:
+        with ThreadPoolExecutor(max_workers=min(8, len(changed_files))) as executor:
+            futures = [
+                executor.submit(_review_one, file_path, changes)
+                for file_path, changes in changed_files.items()
+            ]
+            
+            # Post each file's comments as soon as its review is ready
+            for future in as_completed(futures):
+                bitbucket_api.post_comments(repo_slug, pr_id, future.result())
     
     logger.info("Simulated code review completed")
 
@@ -2,13 +2,45 @@
 Bitbucket API integration for Galaxy Code Review.
 """
 
+import asyncio
+import importlib.util
 import logging
+import threading
+import time
 import requests
-from typing import Dict, List, Any, Optional
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Any, Iterator, Optional, Tuple, Union
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# HTTP/2 needs the optional h2 package; checked without importing it. httpx
+# itself is only imported by aenter, so synchronous use doesn't load it
+_HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+# Maximum number of GET responses kept per client
+GET_CACHE_SIZE = 256
+
+# Seconds a GET response without an ETag is reused; responses with one are
+# revalidated on every request instead
+GET_CACHE_TTL = 60
+
+# Entries per page when listing a directory (the maximum Bitbucket allows)
+DIRECTORY_PAGE_SIZE = 100
+
+# Requests in flight per client, unless set by bitbucket.max_concurrent_requests
+DEFAULT_MAX_CONCURRENT_REQUESTS = 20
+
+# Maximum number of comments posted at the same time by post_comments
+MAX_CONCURRENT_POSTS = 8
+
 
 class BitbucketAPI:
     """
@@ -26,9 +58,107 @@ class BitbucketAPI:
         self.app_password = config['bitbucket']['app_password']
         self.api_url = config['bitbucket']['api_url']
         
-        # Ensure API URL ends with a slash
+        # Ensure API URL ends with a slash so endpoint paths can be appended directly
         if not self.api_url.endswith('/'):
             self.api_url += '/'
+        
+        # Files are reviewed concurrently and each review fetches several files,
+        # so cap the requests in flight to stay within Bitbucket's rate limits
+        self.max_concurrent_requests = config['bitbucket'].get(
+            'max_concurrent_requests', DEFAULT_MAX_CONCURRENT_REQUESTS
+        )
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrent_requests)
+        
+        # Reuse connections across requests instead of a new TLS handshake per call
+        self._session = requests.Session()
+        self._session.auth = (self.username, self.app_password)
+        self._session.headers.update({
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        })
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            # Keep a connection for every request that may be in flight
+            pool_maxsize=max(20, self.max_concurrent_requests),
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        self._session.mount('https://', adapter)
+        
+        # LRU cache of GET responses: key -> (etag, parsed response, time stored)
+        self._get_cache: 'OrderedDict[Tuple, Tuple[Optional[str], Any, float]]' = OrderedDict()
+        self._get_cache_lock = threading.Lock()
+    
+    def clear_cache(self) -> None:
+        """
+        Drop all cached GET responses.
+        """
+        cache = getattr(self, '_get_cache', None)
+        if cache is not None:
+            with self._get_cache_lock:
+                cache.clear()
+    
+    def close(self) -> None:
+        """
+        Close the underlying HTTP session and release pooled connections.
+        """
+        session = getattr(self, '_session', None)
+        if session is not None:
+            session.close()
+    
+    def __enter__(self) -> 'BitbucketAPI':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    async def aenter(self) -> 'BitbucketAPI':
+        """
+        Create the asynchronous HTTP client used by the a* methods.
+        
+        Returns:
+            This client
+            
+        Raises:
+            ImportError: If httpx is not installed
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("httpx is required for async requests. Please install it with 'pip install httpx'")
+        
+        if getattr(self, '_aclient', None) is None:
+            self._aclient = httpx.AsyncClient(
+                auth=(self.username, self.app_password),
+                headers={
+                    'Accept': 'application/json',
+                    'Content-Type': 'application/json'
+                },
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+                http2=_HTTP2_AVAILABLE
+            )
+            # The async requests share the limit on requests in flight
+            self._arequest_slots = asyncio.Semaphore(self.max_concurrent_requests)
+        return self
+    
+    async def aclose(self) -> None:
+        """
+        Close the asynchronous HTTP client.
+        """
+        aclient = getattr(self, '_aclient', None)
+        if aclient is not None:
+            self._aclient = None
+            await aclient.aclose()
+    
+    async def __aenter__(self) -> 'BitbucketAPI':
+        return await self.aenter()
+    
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
     
     def get_pull_request(self, repo_slug: str, pr_id: int) -> Dict[str, Any]:
         """
@@ -44,28 +174,35 @@ class BitbucketAPI:
         Raises:
             Exception: If the API request fails
         """
-        url = urljoin(self.api_url, f'repositories/{repo_slug}/pullrequests/{pr_id}')
+        url = f'{self.api_url}repositories/{repo_slug}/pullrequests/{pr_id}'
         
         response = self._make_request('GET', url)
         return response
     
-    def get_pull_request_diff(self, repo_slug: str, pr_id: int) -> str:
+    def get_pull_request_diff(
+        self, 
+        repo_slug: str, 
+        pr_id: int, 
+        stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Get the diff for a pull request.
         
         Args:
             repo_slug: Repository slug in format workspace/repo-slug
             pr_id: Pull request ID
+            stream: If True, return an iterator over the diff lines instead of
+                loading the whole diff into memory
             
         Returns:
-            Diff content as a string
+            Diff content as a string, or an iterator of lines if streaming
             
         Raises:
             Exception: If the API request fails
         """
-        url = urljoin(self.api_url, f'repositories/{repo_slug}/pullrequests/{pr_id}/diff')
+        url = f'{self.api_url}repositories/{repo_slug}/pullrequests/{pr_id}/diff'
         
-        response = self._make_request('GET', url, raw=True)
+        response = self._make_request('GET', url, raw=True, stream=stream)
         return response
     
     def get_file_content(
@@ -88,11 +225,10 @@ class BitbucketAPI:
         Raises:
             Exception: If the API request fails
         """
-        url = urljoin(self.api_url, f'repositories/{repo_slug}/src')
         if ref:
-            url = urljoin(url + '/', f'{ref}/{file_path}')
+            url = f'{self.api_url}repositories/{repo_slug}/src/{ref}/{file_path}'
         else:
-            url = urljoin(url + '/', file_path)
+            url = f'{self.api_url}repositories/{repo_slug}/src/{file_path}'
         
         response = self._make_request('GET', url, raw=True)
         return response
@@ -117,19 +253,26 @@ class BitbucketAPI:
         Raises:
             Exception: If the API request fails
         """
-        url = urljoin(self.api_url, f'repositories/{repo_slug}/src')
         if ref:
-            url = urljoin(url + '/', f'{ref}/{directory_path}')
+            url = f'{self.api_url}repositories/{repo_slug}/src/{ref}/{directory_path}'
         else:
-            url = urljoin(url + '/', directory_path)
+            url = f'{self.api_url}repositories/{repo_slug}/src/{directory_path}'
         
-        response = self._make_request('GET', url)
+        # Request the largest page size and follow pagination, so that callers
+        # checking for a file in the listing see the whole directory
+        response = self._make_request('GET', url, params={'pagelen': DIRECTORY_PAGE_SIZE})
         
         # Extract file paths from the response
         files = []
-        for item in response.get('values', []):
-            if item.get('type') == 'commit_file':
-                files.append(item.get('path'))
+        while True:
+            for item in response.get('values', []):
+                if item.get('type') == 'commit_file':
+                    files.append(item.get('path'))
+            
+            next_url = response.get('next')
+            if not next_url:
+                break
+            response = self._make_request('GET', next_url)
         
         return files
     
@@ -153,7 +296,7 @@ class BitbucketAPI:
         Raises:
             Exception: If the API request fails
         """
-        url = urljoin(self.api_url, f'repositories/{repo_slug}/commits')
+        url = f'{self.api_url}repositories/{repo_slug}/commits'
         params = {
             'path': file_path,
             'limit': limit
@@ -182,18 +325,52 @@ class BitbucketAPI:
         Raises:
             Exception: If the API request fails
         """
-        url = urljoin(self.api_url, f'repositories/{repo_slug}/pullrequests/{pr_id}/comments')
+        url = f'{self.api_url}repositories/{repo_slug}/pullrequests/{pr_id}/comments'
         
         response = self._make_request('POST', url, json=comment)
         return response
     
+    def post_comments(
+        self, 
+        repo_slug: str, 
+        pr_id: int, 
+        comments: Iterable[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Post several comments on a pull request.
+        
+        Bitbucket has no bulk comment endpoint, so the comments are posted
+        concurrently instead of one round trip after another.
+        
+        Args:
+            repo_slug: Repository slug in format workspace/repo-slug
+            pr_id: Pull request ID
+            comments: Comment objects
+            
+        Returns:
+            API responses, in the order of the comments
+            
+        Raises:
+            Exception: If any of the API requests fails
+        """
+        comments = list(comments)
+        if len(comments) <= 1:
+            return [self.post_comment(repo_slug, pr_id, comment) for comment in comments]
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_POSTS, len(comments))) as executor:
+            return list(executor.map(
+                lambda comment: self.post_comment(repo_slug, pr_id, comment),
+                comments
+            ))
+    
     def _make_request(
         self, 
         method: str, 
         url: str, 
         params: Optional[Dict[str, Any]] = None, 
         json: Optional[Dict[str, Any]] = None, 
-        raw: bool = False
+        raw: bool = False,
+        stream: bool = False
     ) -> Any:
         """
         Make an HTTP request to the Bitbucket API.
@@ -204,37 +381,297 @@ class BitbucketAPI:
             params: Query parameters
             json: JSON body for POST requests
             raw: If True, return the raw response text instead of JSON
+            stream: If True, return an iterator over the response lines without
+                reading the whole body; streamed responses are not cached
             
         Returns:
-            Response as a dictionary or string
+            Response as a dictionary, string, or iterator of lines
             
         Raises:
             Exception: If the API request fails
         """
-        headers = {
-            'Accept': 'application/json',
-            'Content-Type': 'application/json'
-        }
+        cache_key = None
+        cached = None
+        headers = None
+        if method == 'GET' and not stream:
+            cache_key = (url, tuple(sorted(params.items())) if params else None, raw)
+            cached, headers = self._lookup_get_cache(cache_key)
+            if cached is not None and headers is None:
+                return cached[1]
+        
+        data = None
+        if json is not None and orjson is not None:
+            # orjson encodes straight to bytes, much faster than the stdlib
+            # encoder requests would use
+            data = orjson.dumps(json)
+            headers = {**(headers or {}), 'Content-Type': 'application/json'}
+            json = None
         
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                auth=(self.username, self.app_password),
-                headers=headers,
-                params=params,
-                json=json
-            )
+            with self._request_slots:
+                response = self._session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    data=data,
+                    json=json,
+                    headers=headers,
+                    timeout=(5, 30),
+                    stream=stream
+                )
+            
+            if cached is not None and response.status_code == 304:
+                return cached[1]
             
             response.raise_for_status()
             
-            if raw:
-                return response.text
+            if stream:
+                if response.encoding is None:
+                    response.encoding = 'utf-8'
+                # Split on '\n' only, like git; the default splitlines() would
+                # also break lines at form feeds and other separators
+                return response.iter_lines(decode_unicode=True, delimiter='\n')
+            elif raw:
+                result = response.text
+            elif orjson is not None:
+                result = orjson.loads(response.content)
             else:
-                return response.json()
+                result = response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {str(e)}")
             if hasattr(e, 'response') and e.response is not None:
                 logger.error(f"Response status: {e.response.status_code}")
                 logger.error(f"Response body: {e.response.text}")
-            raise Exception(f"Bitbucket API request failed: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Bitbucket API request failed: {str(e)}")
+        except ValueError as e:
+            logger.error(f"Invalid JSON in API response: {str(e)}")
+            raise Exception(f"Bitbucket API request failed: {str(e)}")
+        
+        if cache_key is not None:
+            self._store_get_cache(cache_key, response.headers.get('ETag'), result)
+        
+        return result
+    
+    def _lookup_get_cache(
+        self, 
+        cache_key: Tuple
+    ) -> Tuple[Optional[Tuple[Optional[str], Any, float]], Optional[Dict[str, str]]]:
+        """
+        Look up a cached GET response.
+        
+        Args:
+            cache_key: Key of the GET request
+            
+        Returns:
+            The usable cache entry, or None, and the headers to revalidate it
+            with; without headers the entry can be returned as is
+        """
+        with self._get_cache_lock:
+            cached = self._get_cache.get(cache_key)
+            if cached is not None:
+                self._get_cache.move_to_end(cache_key)
+        
+        if cached is None:
+            return None, None
+        
+        etag, _, stored_at = cached
+        if etag is not None:
+            # Revalidate cheaply; a 304 means the cached body is still current
+            return cached, {'If-None-Match': etag}
+        if time.monotonic() - stored_at < GET_CACHE_TTL:
+            return cached, None
+        # Without an ETag the response can't be revalidated, so it is only
+        # reused for a short time
+        return None, None
+    
+    def _store_get_cache(self, cache_key: Tuple, etag: Optional[str], result: Any) -> None:
+        """
+        Cache a GET response, evicting the least recently used one if full.
+        
+        Args:
+            cache_key: Key of the GET request
+            etag: ETag of the response, if it had one
+            result: Parsed response
+        """
+        with self._get_cache_lock:
+            self._get_cache[cache_key] = (etag, result, time.monotonic())
+            self._get_cache.move_to_end(cache_key)
+            if len(self._get_cache) > GET_CACHE_SIZE:
+                self._get_cache.popitem(last=False)
+    
+    async def aget_pull_request(self, repo_slug: str, pr_id: int) -> Dict[str, Any]:
+        """
+        Asynchronously get pull request information.
+        
+        Args:
+            repo_slug: Repository slug in format workspace/repo-slug
+            pr_id: Pull request ID
+            
+        Returns:
+            Pull request information as a dictionary
+            
+        Raises:
+            Exception: If the API request fails
+        """
+        url = f'{self.api_url}repositories/{repo_slug}/pullrequests/{pr_id}'
+        
+        return await self._amake_request('GET', url)
+    
+    async def aget_file_content(
+        self, 
+        repo_slug: str, 
+        file_path: str, 
+        ref: Optional[str] = None
+    ) -> str:
+        """
+        Asynchronously get the content of a file from the repository.
+        
+        Args:
+            repo_slug: Repository slug in format workspace/repo-slug
+            file_path: Path to the file
+            ref: Git reference (branch, tag, or commit), defaults to the main branch
+            
+        Returns:
+            File content as a string
+            
+        Raises:
+            Exception: If the API request fails
+        """
+        if ref:
+            url = f'{self.api_url}repositories/{repo_slug}/src/{ref}/{file_path}'
+        else:
+            url = f'{self.api_url}repositories/{repo_slug}/src/{file_path}'
+        
+        return await self._amake_request('GET', url, raw=True)
+    
+    async def apost_comment(
+        self, 
+        repo_slug: str, 
+        pr_id: int, 
+        comment: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Asynchronously post a comment on a pull request.
+        
+        Args:
+            repo_slug: Repository slug in format workspace/repo-slug
+            pr_id: Pull request ID
+            comment: Comment object
+            
+        Returns:
+            API response
+            
+        Raises:
+            Exception: If the API request fails
+        """
+        url = f'{self.api_url}repositories/{repo_slug}/pullrequests/{pr_id}/comments'
+        
+        return await self._amake_request('POST', url, json=comment)
+    
+    async def apost_comments(
+        self, 
+        repo_slug: str, 
+        pr_id: int, 
+        comments: Iterable[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Asynchronously post several comments on a pull request.
+        
+        The comments are posted concurrently, at most MAX_CONCURRENT_POSTS at a time.
+        
+        Args:
+            repo_slug: Repository slug in format workspace/repo-slug
+            pr_id: Pull request ID
+            comments: Comment objects
+            
+        Returns:
+            API responses, in the order of the comments
+            
+        Raises:
+            Exception: If any of the API requests fails
+        """
+        slots = asyncio.Semaphore(MAX_CONCURRENT_POSTS)
+        
+        async def post(comment: Dict[str, Any]) -> Dict[str, Any]:
+            async with slots:
+                return await self.apost_comment(repo_slug, pr_id, comment)
+        
+        return list(await asyncio.gather(*(post(comment) for comment in comments)))
+    
+    async def _amake_request(
+        self, 
+        method: str, 
+        url: str, 
+        params: Optional[Dict[str, Any]] = None, 
+        json: Optional[Dict[str, Any]] = None, 
+        raw: bool = False
+    ) -> Any:
+        """
+        Make an asynchronous HTTP request to the Bitbucket API.
+        
+        The async client is created on first use if aenter() was not called.
+        GET responses share the cache and ETag revalidation of _make_request,
+        and requests in flight are limited like synchronous ones.
+        
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            url: API endpoint URL
+            params: Query parameters
+            json: JSON body for POST requests
+            raw: If True, return the raw response text instead of JSON
+            
+        Returns:
+            Response as a dictionary or string
+            
+        Raises:
+            Exception: If the API request fails
+        """
+        if getattr(self, '_aclient', None) is None:
+            await self.aenter()
+        import httpx
+        
+        cache_key = None
+        cached = None
+        headers = None
+        if method == 'GET':
+            cache_key = (url, tuple(sorted(params.items())) if params else None, raw)
+            cached, headers = self._lookup_get_cache(cache_key)
+            if cached is not None and headers is None:
+                return cached[1]
+        
+        content = None
+        if json is not None and orjson is not None:
+            content = orjson.dumps(json)
+            headers = {**(headers or {}), 'Content-Type': 'application/json'}
+            json = None
+        
+        try:
+            async with self._arequest_slots:
+                response = await self._aclient.request(
+                    method, url, params=params, content=content, json=json, headers=headers
+                )
+            
+            if cached is not None and response.status_code == 304:
+                return cached[1]
+            
+            response.raise_for_status()
+            
+            if raw:
+                result = response.text
+            elif orjson is not None:
+                result = orjson.loads(response.content)
+            else:
+                result = response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"API request failed: {str(e)}")
+            if isinstance(e, httpx.HTTPStatusError):
+                logger.error(f"Response status: {e.response.status_code}")
+                logger.error(f"Response body: {e.response.text}")
+            raise Exception(f"Bitbucket API request failed: {str(e)}")
+        except ValueError as e:
+            logger.error(f"Invalid JSON in API response: {str(e)}")
+            raise Exception(f"Bitbucket API request failed: {str(e)}")        
+        if cache_key is not None:
+            self._store_get_cache(cache_key, response.headers.get('ETag'), result)
+        
+        return result
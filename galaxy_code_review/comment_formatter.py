@@ -3,34 +3,93 @@ Comment Formatter component for generating Bitbucket comments.
 """
 
 import logging
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any
 
 logger = logging.getLogger(__name__)
 
+_SEVERITY_DEFAULT = '💡 Info'
+
+_SEVERITY_MAP = {
+    'info': '💡 Info',
+    'warning': '⚠️ Warning',
+    'error': '🛑 Error'
+}
+
+_CATEGORY_MAP = {
+    'security': '🔒 **Security**',
+    'performance': '⚡ **Performance**',
+    'style': '🎨 **Style**',
+    'bug': '🐛 **Bug**',
+    'logic': '🧠 **Logic**',
+    'maintainability': '🔧 **Maintainability**',
+    'test': '🧪 **Testing**',
+    'documentation': '📝 **Documentation**'
+}
+
+
+def _comment_header(severity: str, category: str) -> str:
+    """
+    Build the severity and category header that prefixes a comment.
+    
+    Args:
+        severity: Severity level ('info', 'warning', or 'error')
+        category: Category of the issue
+        
+    Returns:
+        Header string including the trailing blank line
+    """
+    severity_emoji = _SEVERITY_MAP.get(severity.lower(), _SEVERITY_DEFAULT)
+    category_badge = _CATEGORY_MAP.get(category.lower(), f'**{category.capitalize()}**')
+    return f"{severity_emoji} {category_badge}\n\n"
+
+
+# Headers for the lowercase severity/category values the reviewer normally
+# emits, so the common case is a single dict lookup
+_COMMENT_HEADERS = {
+    (severity, category): _comment_header(severity, category)
+    for severity in _SEVERITY_MAP
+    for category in (*_CATEGORY_MAP, 'general')
+}
+
 
 class CommentFormatter:
     """
     Formats review comments for Bitbucket API.
     """
     
-    def format(self, review_comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def format(self, review_comments: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
         """
         Format review comments for Bitbucket API.
         
+        Comments are formatted lazily as the result is iterated; use
+        format_list() when a list is needed.
+        
+        The formatted comments contain only JSON-native types (dicts, strings
+        and the line numbers from the reviewer), so they can be serialized by
+        orjson's fast path when posted.
+        
         Args:
-            review_comments: List of review comment objects from the reviewer agent
+            review_comments: Review comment objects from the reviewer agent
             
         Returns:
-            List of formatted comment objects ready for Bitbucket API
+            Iterator of formatted comment objects ready for Bitbucket API
         """
-        formatted_comments = []
-        
         for comment in review_comments:
             formatted_comment = self._format_comment(comment)
-            if formatted_comment:
-                formatted_comments.append(formatted_comment)
+            if formatted_comment is not None:
+                yield formatted_comment
+    
+    def format_list(self, review_comments: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Format review comments for Bitbucket API into a list.
         
-        return formatted_comments
+        Args:
+            review_comments: Review comment objects from the reviewer agent
+            
+        Returns:
+            List of formatted comment objects ready for Bitbucket API
+        """
+        return list(self.format(review_comments))
     
     def _format_comment(self, comment: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -42,18 +101,18 @@ class CommentFormatter:
         Returns:
             Formatted comment object ready for Bitbucket API
         """
-        if 'line' not in comment or 'content' not in comment:
+        try:
+            line = comment['line']
+            raw_content = comment['content']
+        except KeyError:
             logger.warning("Comment missing required fields, skipping")
             return None
         
-        # Get severity emoji
-        severity_emoji = self._get_severity_emoji(comment.get('severity', 'info'))
-        
-        # Get category badge
-        category_badge = self._get_category_badge(comment.get('category', 'general'))
-        
-        # Format the comment content with severity and category
-        content = f"{severity_emoji} {category_badge}\n\n{comment['content']}"
+        # Prefix the comment content with severity and category
+        severity = comment.get('severity', 'info')
+        category = comment.get('category', 'general')
+        header = _COMMENT_HEADERS.get((severity, category)) or _comment_header(severity, category)
+        content = f"{header}{raw_content}"
         
         # Create the formatted comment object
         formatted_comment = {
@@ -62,49 +121,8 @@ class CommentFormatter:
             },
             'inline': {
                 'path': comment.get('file_path', ''),
-                'to': comment['line']
+                'to': line
             }
         }
         
         return formatted_comment
-    
-    def _get_severity_emoji(self, severity: str) -> str:
-        """
-        Get emoji for comment severity.
-        
-        Args:
-            severity: Severity level ('info', 'warning', or 'error')
-            
-        Returns:
-            Emoji string
-        """
-        severity_map = {
-            'info': '💡 Info',
-            'warning': '⚠️ Warning',
-            'error': '🛑 Error'
-        }
-        
-        return severity_map.get(severity.lower(), '💡 Info')
-    
-    def _get_category_badge(self, category: str) -> str:
-        """
-        Get badge for comment category.
-        
-        Args:
-            category: Category of the issue
-            
-        Returns:
-            Badge string
-        """
-        category_map = {
-            'security': '🔒 **Security**',
-            'performance': '⚡ **Performance**',
-            'style': '🎨 **Style**',
-            'bug': '🐛 **Bug**',
-            'logic': '🧠 **Logic**',
-            'maintainability': '🔧 **Maintainability**',
-            'test': '🧪 **Testing**',
-            'documentation': '📝 **Documentation**'
-        }
-        
-        return category_map.get(category.lower(), f'**{category.capitalize()}**')
\ No newline at end of file
@@ -2,6 +2,8 @@
 Configuration management for Bitbucket Galaxy Code Review.
 """
 
+import copy
+import functools
 import os
 import yaml
 import logging
@@ -9,10 +11,31 @@ from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# Prefer the libyaml-backed loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# TOML configuration files are supported through the standard library on
+# Python 3.11+ and through tomli on older versions
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+_REQUIRED_SECTIONS = frozenset({'bitbucket', 'reviewer'})
+_REQUIRED_BITBUCKET_FIELDS = frozenset({'username', 'app_password', 'api_url'})
+_REQUIRED_REVIEWER_FIELDS = frozenset({'model', 'temperature'})
+
 
 def load_config(config_path: str) -> Dict[str, Any]:
     """
-    Load configuration from a YAML file.
+    Load configuration from a YAML or TOML file.
+    
+    Files ending in .toml are parsed as TOML; anything else is parsed as YAML.
+    Parsed configurations are cached per file and reused until the file's
+    modification time or size changes.
     
     Args:
         config_path: Path to the configuration file
@@ -24,23 +47,59 @@ def load_config(config_path: str) -> Dict[str, Any]:
         FileNotFoundError: If the configuration file doesn't exist
         ValueError: If the configuration is invalid
     """
-    if not os.path.exists(config_path):
+    try:
+        st = os.stat(config_path)
+    except OSError:
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
     
+    # Copy so callers can't mutate the cached configuration
+    config = copy.deepcopy(
+        _parse_config(os.path.abspath(config_path), st.st_mtime_ns, st.st_size)
+    )
+    
+    # Set environment variables if specified
+    if 'env_vars' in config:
+        for key, value in config['env_vars'].items():
+            os.environ[key] = str(value)
+    
+    return config
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config(config_path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """
+    Parse and validate a configuration file.
+    
+    The modification time and size are only part of the cache key, so that a
+    changed file is parsed again.
+    
+    Args:
+        config_path: Absolute path to the configuration file
+        mtime_ns: Modification time of the file in nanoseconds
+        size: Size of the file in bytes
+        
+    Returns:
+        Dictionary containing configuration values
+        
+    Raises:
+        ValueError: If the configuration is invalid
+    """
+    is_toml = config_path.endswith('.toml')
+    if is_toml and tomllib is None:
+        raise ValueError("TOML configuration files require Python 3.11+ or the 'tomli' package")
+    
     try:
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        with open(config_path, 'rb') as f:
+            if is_toml:
+                config = tomllib.load(f)
+            else:
+                config = yaml.load(f, Loader=_YAML_LOADER)
     except Exception as e:
         raise ValueError(f"Failed to parse configuration file: {str(e)}")
     
     # Validate required configuration
     validate_config(config)
     
-    # Set environment variables if specified
-    if 'env_vars' in config:
-        for key, value in config['env_vars'].items():
-            os.environ[key] = str(value)
-    
     return config
 
 
@@ -55,21 +114,24 @@ def validate_config(config: Dict[str, Any]) -> None:
         ValueError: If required configuration is missing
     """
     # Check for required top-level sections
-    required_sections = ['bitbucket', 'reviewer']
-    for section in required_sections:
-        if section not in config:
-            raise ValueError(f"Missing required configuration section: {section}")
+    if not isinstance(config, dict):
+        raise ValueError("Configuration must be a mapping")
+    missing = _REQUIRED_SECTIONS - config.keys()
+    if missing:
+        raise ValueError(f"Missing required configuration section: {', '.join(sorted(missing))}")
     
     # Validate Bitbucket configuration
-    required_bitbucket_fields = ['username', 'app_password', 'api_url']
-    for field in required_bitbucket_fields:
-        if field not in config['bitbucket']:
-            raise ValueError(f"Missing required Bitbucket configuration: {field}")
+    if not isinstance(config['bitbucket'], dict):
+        raise ValueError("Bitbucket configuration must be a mapping")
+    missing = _REQUIRED_BITBUCKET_FIELDS - config['bitbucket'].keys()
+    if missing:
+        raise ValueError(f"Missing required Bitbucket configuration: {', '.join(sorted(missing))}")
     
     # Validate reviewer configuration
-    required_reviewer_fields = ['model', 'temperature']
-    for field in required_reviewer_fields:
-        if field not in config['reviewer']:
-            raise ValueError(f"Missing required reviewer configuration: {field}")
+    if not isinstance(config['reviewer'], dict):
+        raise ValueError("Reviewer configuration must be a mapping")
+    missing = _REQUIRED_REVIEWER_FIELDS - config['reviewer'].keys()
+    if missing:
+        raise ValueError(f"Missing required reviewer configuration: {', '.join(sorted(missing))}")
     
     logger.debug("Configuration validation successful")
\ No newline at end of file
@@ -3,12 +3,39 @@ Context Retriever component for collecting relevant context from the codebase.
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 
 from galaxy_code_review.bitbucket_api import BitbucketAPI
 
 logger = logging.getLogger(__name__)
 
+# Import statement patterns, matched line by line across the whole file.
+# [^\S\n] is whitespace that does not cross a line boundary.
+_PY_IMPORT_RES = tuple(re.compile(p, re.MULTILINE) for p in (
+    r'^[^\S\n]*import[^\S\n]+(.+?)(?:[^\S\n]+as[^\S\n]+.+?)?[^\S\n]*$',  # import module
+    r'^[^\S\n]*from[^\S\n]+(.+?)[^\S\n]+import[^\S\n]+.+?[^\S\n]*$'      # from module import ...
+))
+
+_JS_IMPORT_RES = tuple(re.compile(p, re.MULTILINE) for p in (
+    r'^[^\S\n]*import[^\S\n]+.*?from[^\S\n]+[\'"](.+?)[\'"].*?[^\S\n]*$',  # import ... from 'module'
+    r'^[^\S\n]*const[^\S\n]+.*?require\([\'"](.+?)[\'"]\).*?[^\S\n]*$'  # const ... = require('module')
+))
+
+_IMPORT_RES_BY_EXTENSION = {
+    '.py': _PY_IMPORT_RES,
+    '.js': _JS_IMPORT_RES,
+    '.ts': _JS_IMPORT_RES
+}
+
+# Extensions probed, in order of preference, when looking for test files
+_TEST_FILE_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.go')
+
+# Maximum number of related files fetched concurrently
+MAX_FETCH_WORKERS = 8
+
 
 class ContextRetriever:
     """
@@ -23,6 +50,18 @@ class ContextRetriever:
             bitbucket_api: BitbucketAPI instance for retrieving files
         """
         self.bitbucket_api = bitbucket_api
+        
+        # File contents keyed by (repo_slug, file_path, branch) for the lifetime
+        # of this retriever; files that could not be fetched are stored as ""
+        # so they are not requested again
+        self._content_cache: Dict[Tuple[str, str, Optional[str]], str] = {}
+        
+        # Directory listings keyed the same way; directories that could not be
+        # listed (usually because they don't exist) are stored as []
+        self._listing_cache: Dict[Tuple[str, str, Optional[str]], List[str]] = {}
+        
+        # Context gathered per file, keyed the same way, without the PR description
+        self._context_cache: Dict[Tuple[str, str, Optional[str]], Dict[str, Any]] = {}
     
     def get_context(
         self, 
@@ -46,20 +85,29 @@ class ContextRetriever:
             - file_history: Recent commit history for this file
             - pr_description: Description of the pull request
         """
-        context = {
-            'file_content': self._get_file_content(repo_slug, pr_info, file_path),
-            'imports': self._extract_imports(repo_slug, pr_info, file_path),
-            'related_files': self._find_related_files(repo_slug, pr_info, file_path),
-            'file_history': self._get_file_history(repo_slug, file_path),
-            'pr_description': pr_info.get('description', '')
-        }
-        
-        return context
+        # Files are read from the source branch of the PR
+        source_branch = pr_info.get('source', {}).get('branch', {}).get('name') or None
+        
+        cache_key = (repo_slug, file_path, source_branch)
+        context = self._context_cache.get(cache_key)
+        if context is None:
+            file_content = self._get_file_content(repo_slug, source_branch, file_path)
+            
+            context = {
+                'file_content': file_content,
+                'imports': self._extract_imports_from_content(file_path, file_content),
+                'related_files': self._find_related_files(repo_slug, source_branch, file_path),
+                'file_history': self._get_file_history(repo_slug, file_path)
+            }
+            self._context_cache[cache_key] = context
+        
+        # Copy so callers can't modify the cached context
+        return dict(context, pr_description=pr_info.get('description', ''))
     
     def _get_file_content(
         self, 
         repo_slug: str, 
-        pr_info: Dict[str, Any], 
+        source_branch: Optional[str], 
         file_path: str
     ) -> str:
         """
@@ -67,75 +115,81 @@ class ContextRetriever:
         
         Args:
             repo_slug: Repository slug
-            pr_info: Pull request information
+            source_branch: Source branch of the PR, or None for the default branch
             file_path: Path to the file
             
         Returns:
             Content of the file as a string
         """
+        cache_key = (repo_slug, file_path, source_branch)
+        content = self._content_cache.get(cache_key)
+        if content is not None:
+            return content
+        
         try:
-            # Get the file from the source branch of the PR
-            source_branch = pr_info.get('source', {}).get('branch', {}).get('name')
             if not source_branch:
-                logger.warning(f"Could not determine source branch for PR, using default branch")
-                return self.bitbucket_api.get_file_content(repo_slug, file_path)
-            
-            return self.bitbucket_api.get_file_content(repo_slug, file_path, source_branch)
+                logger.warning("Could not determine source branch for PR, using default branch")
+                content = self.bitbucket_api.get_file_content(repo_slug, file_path)
+            else:
+                content = self.bitbucket_api.get_file_content(repo_slug, file_path, source_branch)
         except Exception as e:
-            logger.warning(f"Failed to get content for {file_path}: {str(e)}")
-            return ""
+            logger.warning("Failed to get content for %s: %s", file_path, e)
+            content = ""
+        
+        self._content_cache[cache_key] = content
+        return content
     
-    def _extract_imports(
+    def _list_directory(
         self, 
         repo_slug: str, 
-        pr_info: Dict[str, Any], 
-        file_path: str
+        source_branch: Optional[str], 
+        directory: str
     ) -> List[str]:
         """
-        Extract import statements from a file to understand dependencies.
+        List the files in a directory of the pull request's source branch.
         
         Args:
             repo_slug: Repository slug
-            pr_info: Pull request information
-            file_path: Path to the file
+            source_branch: Source branch of the PR, or None for the default branch
+            directory: Path to the directory, or "" for the repository root
+            
+        Returns:
+            List of file paths, empty if the directory could not be listed
+        """
+        cache_key = (repo_slug, directory, source_branch)
+        listing = self._listing_cache.get(cache_key)
+        if listing is not None:
+            return listing
+        
+        try:
+            listing = self.bitbucket_api.list_directory(repo_slug, directory, source_branch)
+        except Exception as e:
+            logger.warning("Failed to list directory %s: %s", directory or '/', e)
+            listing = []
+        
+        self._listing_cache[cache_key] = listing
+        return listing
+    
+    def _extract_imports_from_content(self, file_path: str, content: str) -> List[str]:
+        """
+        Extract import statements from a file to understand dependencies.
+        
+        Args:
+            file_path: Path to the file, used to detect the language
+            content: Content of the file
             
         Returns:
             List of import statements
         """
-        content = self._get_file_content(repo_slug, pr_info, file_path)
         if not content:
             return []
         
-        imports = []
-        
         # Simple regex-based extraction for different languages
-        if file_path.endswith('.py'):
-            # Python imports
-            import re
-            import_patterns = [
-                r'^\s*import\s+(.+?)(?:\s+as\s+.+?)?\s*$',  # import module
-                r'^\s*from\s+(.+?)\s+import\s+.+?\s*$'      # from module import ...
-            ]
-            
-            for pattern in import_patterns:
-                for line in content.split('\n'):
-                    match = re.match(pattern, line)
-                    if match:
-                        imports.append(match.group(0).strip())
-        
-        elif file_path.endswith('.js') or file_path.endswith('.ts'):
-            # JavaScript/TypeScript imports
-            import re
-            import_patterns = [
-                r'^\s*import\s+.*?from\s+[\'"](.+?)[\'"].*?\s*$',  # import ... from 'module'
-                r'^\s*const\s+.*?require\([\'"](.+?)[\'"]\).*?\s*$'  # const ... = require('module')
-            ]
-            
-            for pattern in import_patterns:
-                for line in content.split('\n'):
-                    match = re.match(pattern, line)
-                    if match:
-                        imports.append(match.group(0).strip())
+        patterns = _IMPORT_RES_BY_EXTENSION.get(os.path.splitext(file_path)[1], ())
+        
+        imports = []
+        for pattern in patterns:
+            imports.extend(match.group(0).strip() for match in pattern.finditer(content))
         
         # Add more language-specific import extraction as needed
         
@@ -144,7 +198,7 @@ class ContextRetriever:
     def _find_related_files(
         self, 
         repo_slug: str, 
-        pr_info: Dict[str, Any], 
+        source_branch: Optional[str], 
         file_path: str
     ) -> Dict[str, str]:
         """
@@ -152,7 +206,7 @@ class ContextRetriever:
         
         Args:
             repo_slug: Repository slug
-            pr_info: Pull request information
+            source_branch: Source branch of the PR, or None for the default branch
             file_path: Path to the file
             
         Returns:
@@ -160,24 +214,7 @@ class ContextRetriever:
         """
         related_files = {}
         
-        # Get files in the same directory
         directory = '/'.join(file_path.split('/')[:-1])
-        if directory:
-            try:
-                directory_files = self.bitbucket_api.list_directory(
-                    repo_slug, 
-                    directory, 
-                    pr_info.get('source', {}).get('branch', {}).get('name')
-                )
-                
-                # Get content of files in the same directory (limit to 5 to avoid too much data)
-                for related_path in directory_files[:5]:
-                    if related_path != file_path:
-                        content = self._get_file_content(repo_slug, pr_info, related_path)
-                        if content:
-                            related_files[related_path] = content
-            except Exception as e:
-                logger.warning(f"Failed to list directory {directory}: {str(e)}")
         
         # Find test files for the current file
         filename = file_path.split('/')[-1]
@@ -191,18 +228,53 @@ class ContextRetriever:
             f"tests/test_{base_name}"
         ]
         
+        # List the file's directory and the directories test files can live in
+        # once each, instead of probing every candidate test path
+        directories = list(dict.fromkeys(
+            ([directory] if directory else []) + [pattern.rpartition('/')[0] for pattern in test_patterns]
+        ))
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(directories))) as executor:
+            listings = dict(zip(directories, executor.map(
+                lambda path: self._list_directory(repo_slug, source_branch, path),
+                directories
+            )))
+        
+        # Get files in the same directory
+        sibling_paths = []
+        if directory:
+            # Limit to 5 files in the same directory to avoid too much data
+            sibling_paths = [path for path in listings[directory][:5] if path != file_path]
+        
+        # Test files that exist for each pattern, in order of extension preference
+        test_paths = []
         for pattern in test_patterns:
-            try:
-                # Try to find test files with common extensions
-                for ext in ['.py', '.js', '.ts', '.java', '.go']:
-                    test_path = f"{pattern}{ext}"
-                    content = self._get_file_content(repo_slug, pr_info, test_path)
-                    if content:
-                        related_files[test_path] = content
-                        break  # Found one test file, no need to check other extensions
-            except Exception:
-                # Ignore errors when test files don't exist
-                pass
+            listing = set(listings[pattern.rpartition('/')[0]])
+            test_paths.append([
+                f"{pattern}{ext}" for ext in _TEST_FILE_EXTENSIONS
+                if f"{pattern}{ext}" in listing
+            ])
+        
+        # Fetch all candidates concurrently; the requests are independent and
+        # dominated by network latency
+        candidates = sibling_paths + [path for paths in test_paths for path in paths]
+        contents = {}
+        if candidates:
+            with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(candidates))) as executor:
+                contents = dict(zip(candidates, executor.map(
+                    lambda path: self._get_file_content(repo_slug, source_branch, path),
+                    candidates
+                )))
+        
+        for related_path in sibling_paths:
+            if contents[related_path]:
+                related_files[related_path] = contents[related_path]
+        
+        for paths in test_paths:
+            # Use the first extension that exists for each pattern
+            for test_path in paths:
+                if contents[test_path]:
+                    related_files[test_path] = contents[test_path]
+                    break
         
         return related_files
     
@@ -222,5 +294,5 @@ class ContextRetriever:
             commits = self.bitbucket_api.get_file_commits(repo_slug, file_path, limit=5)
             return commits
         except Exception as e:
-            logger.warning(f"Failed to get commit history for {file_path}: {str(e)}")
+            logger.warning("Failed to get commit history for %s: %s", file_path, e)
             return []
\ No newline at end of file
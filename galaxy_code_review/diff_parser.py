@@ -2,8 +2,22 @@
 Diff Parser component for extracting and understanding code changes.
 """
 
-import re
-from typing import Dict, List, Tuple, Any
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any, Union
+
+# Use RE2's linear-time DFA matcher when available; the header pattern has no
+# backreferences or lookarounds, so it behaves the same under both engines
+try:
+    import re2 as _re
+except ImportError:
+    import re as _re
+
+# File headers and hunk headers in a single pattern, so the diff is scanned once.
+# Multiline mode is set inline because RE2 does not accept re's flag constants.
+_HEADER_RE = _re.compile(
+    r'(?m)^(?:diff --git a/(.*?) b/(.*?)$|@@ -(\d+),?(\d*) \+(\d+),?(\d*) @@)'
+)
 
 
 class DiffParser:
@@ -11,12 +25,14 @@ class DiffParser:
     Parser for git diff output to extract changed files and lines.
     """
     
-    def parse(self, diff_content: str) -> Dict[str, List[Dict[str, Any]]]:
+    def parse(self, diff_content: Union[str, Iterable[str]]) -> Dict[str, List[Dict[str, Any]]]:
         """
         Parse git diff content to extract changed files and their modifications.
         
         Args:
-            diff_content: Raw git diff content
+            diff_content: Raw git diff content, either as a single string or as
+                an iterable of lines without line terminators (e.g. a streamed
+                response from BitbucketAPI.get_pull_request_diff)
             
         Returns:
             Dictionary mapping file paths to lists of change objects.
@@ -28,73 +44,154 @@ class DiffParser:
             - old_start_line: Starting line number in the old file (for modifications)
             - old_end_line: Ending line number in the old file (for modifications)
         """
-        if not diff_content:
-            return {}
+        return {
+            file_path: [change for _, change in file_changes]
+            for file_path, file_changes in groupby(self.parse_iter(diff_content), key=itemgetter(0))
+        }
+    
+    def parse_iter(self, diff_content: Union[str, Iterable[str]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Lazily parse git diff content, yielding changes one at a time.
         
-        # Split diff into file chunks
-        file_pattern = r'diff --git a/(.*?) b/(.*?)\n'
-        file_chunks = re.split(file_pattern, diff_content)
+        Changes are produced in diff order, so all changes of a file are
+        yielded consecutively. Only the changes of the hunk being processed
+        are held in memory. When diff_content is an iterable of lines, it is
+        consumed one file at a time, so a streamed diff never has to be held
+        in memory as a whole.
         
-        # First chunk is empty, then we have triplets of [file_a, file_b, chunk_content]
-        result = {}
+        Args:
+            diff_content: Raw git diff content, as accepted by parse
+            
+        Yields:
+            (file_path, change) tuples, with change objects as described in parse
+        """
+        if isinstance(diff_content, str):
+            yield from self._parse_text(diff_content)
+            return
         
-        for i in range(1, len(file_chunks), 3):
-            if i + 2 >= len(file_chunks):
-                break
-                
-            file_a = file_chunks[i]
-            file_b = file_chunks[i + 1]
-            chunk_content = file_chunks[i + 2]
+        # Split the lines at file headers and parse each file's part on its own
+        file_lines = []
+        for line in diff_content:
+            if line.startswith('diff --git a/') and ' b/' in line and file_lines:
+                yield from self._parse_text('\n'.join(file_lines))
+                file_lines = []
+            file_lines.append(line)
+        
+        if file_lines:
+            yield from self._parse_text('\n'.join(file_lines))
+    
+    def _parse_text(self, diff_content: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Parse git diff content held in a single string.
+        
+        Args:
+            diff_content: Raw git diff content
             
-            # Use file_b as the current file path (post-change)
-            file_path = file_b
+        Yields:
+            (file_path, change) tuples
+        """
+        # Nothing to parse without at least one file header
+        if not diff_content or 'diff --git' not in diff_content:
+            return
+        
+        file_path = None
+        header_start = 0
+        header_end = 0
+        hunks = []
+        
+        # Header fields and body offset of the hunk currently being read
+        hunk = None
+        body_start = 0
+        
+        for match in _HEADER_RE.finditer(diff_content):
+            if hunk is not None:
+                hunks.append((hunk, body_start, match.start()))
+                hunk = None
             
-            # Skip binary files
-            if "Binary files" in chunk_content:
-                continue
+            if match.group(1) is not None:
+                # New file: finish the previous one
+                yield from self._iter_file_changes(
+                    diff_content, file_path, header_start, header_end, hunks
+                )
                 
-            # Extract hunk headers and content
-            changes = self._parse_hunks(chunk_content)
-            
-            if changes:
-                result[file_path] = changes
+                # Use file_b as the current file path (post-change)
+                file_path = match.group(2)
+                header_start = match.end()
+                header_end = None
+                hunks = []
+            elif file_path is not None:
+                if header_end is None:
+                    header_end = match.start()
                 
-        return result
+                old_start, old_count, new_start, new_count = match.group(3, 4, 5, 6)
+                hunk = (
+                    int(old_start),
+                    int(old_count) if old_count else 1,
+                    int(new_start),
+                    int(new_count) if new_count else 1
+                )
+                body_start = match.end()
+        
+        if hunk is not None:
+            hunks.append((hunk, body_start, len(diff_content)))
+        yield from self._iter_file_changes(
+            diff_content, file_path, header_start, header_end, hunks
+        )
     
-    def _parse_hunks(self, chunk_content: str) -> List[Dict[str, Any]]:
+    def _iter_file_changes(
+        self, 
+        diff_content: str, 
+        file_path: Optional[str], 
+        header_start: int, 
+        header_end: Optional[int], 
+        hunks: List[Tuple[Tuple[int, int, int, int], int, int]]
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
         """
-        Parse diff hunks to extract line changes.
+        Parse the hunks of one file and yield its changes.
         
         Args:
-            chunk_content: Content of a file diff chunk
+            diff_content: Raw git diff content
+            file_path: Path of the file, or None before the first file header
+            header_start: Offset where the file's extended header starts
+            header_end: Offset of the file's first hunk header, or None if the
+                file has no hunks
+            hunks: (header, body start, body end) for each hunk of the file
             
-        Returns:
-            List of change objects
+        Yields:
+            (file_path, change) tuples
         """
-        # Extract hunk headers
-        hunk_pattern = r'@@ -(\d+),?(\d*) \+(\d+),?(\d*) @@'
-        hunks = re.split(hunk_pattern, chunk_content)
+        # Binary files and pure renames/mode changes have no hunks
+        if file_path is None or not hunks:
+            return
         
-        changes = []
+        # Skip binary files; the marker can only appear before the first hunk
+        if diff_content.find("Binary files", header_start, header_end) != -1:
+            return
         
-        # First element is the file header, then we have groups of 5 elements
-        for i in range(1, len(hunks), 5):
-            if i + 4 >= len(hunks):
-                break
-                
-            old_start = int(hunks[i])
-            old_count = int(hunks[i + 1]) if hunks[i + 1] else 1
-            new_start = int(hunks[i + 2])
-            new_count = int(hunks[i + 3]) if hunks[i + 3] else 1
-            hunk_content = hunks[i + 4]
+        for change in self._parse_hunks(diff_content, hunks):
+            yield file_path, change
+    
+    def _parse_hunks(
+        self, 
+        diff_content: str, 
+        hunks: List[Tuple[Tuple[int, int, int, int], int, int]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Parse diff hunks to extract line changes.
+        
+        Args:
+            diff_content: Raw git diff content
+            hunks: (header, body start, body end) for each hunk, where header is
+                (old_start, old_count, new_start, new_count)
             
+        Yields:
+            Change objects
+        """
+        for (old_start, old_count, new_start, new_count), body_start, body_end in hunks:
             # Process the lines in this hunk
-            hunk_changes = self._process_hunk_lines(
-                hunk_content, old_start, old_count, new_start, new_count
+            yield from self._process_hunk_lines(
+                diff_content[body_start:body_end], old_start, old_count, new_start, new_count
             )
-            changes.extend(hunk_changes)
-            
-        return changes
     
     def _process_hunk_lines(
         self, 
@@ -103,7 +200,7 @@ class DiffParser:
         old_count: int, 
         new_start: int, 
         new_count: int
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[Dict[str, Any]]:
         """
         Process the lines in a diff hunk to identify changes.
         
@@ -114,10 +211,9 @@ class DiffParser:
             new_start: Starting line number in the new file
             new_count: Number of lines in the new file
             
-        Returns:
-            List of change objects
+        Yields:
+            Change objects
         """
-        changes = []
         lines = hunk_content.split('\n')
         
         # Skip the first line if it's empty (happens after the hunk header)
@@ -126,62 +222,68 @@ class DiffParser:
         old_line = old_start
         new_line = new_start
         
-        # Group consecutive additions/deletions
+        # Group consecutive additions/deletions. While grouping, 'content' holds
+        # a list of lines that is joined once the change is complete, to avoid
+        # repeated string concatenation on long blocks.
         current_change = None
         
         for line in lines[start_idx:]:
             if not line:
                 continue
-                
-            if line.startswith('+'):
+            
+            marker = line[0]
+            
+            if marker == '+':
                 # Addition
                 if current_change and current_change['type'] == 'addition':
                     # Extend current addition
-                    current_change['content'] += '\n' + line[1:]
+                    current_change['content'].append(line[1:])
                     current_change['end_line'] = new_line
                 else:
                     # Start new addition
                     if current_change:
-                        changes.append(current_change)
+                        current_change['content'] = '\n'.join(current_change['content'])
+                        yield current_change
                     current_change = {
                         'type': 'addition',
                         'start_line': new_line,
                         'end_line': new_line,
-                        'content': line[1:]
+                        'content': [line[1:]]
                     }
                 new_line += 1
                 
-            elif line.startswith('-'):
+            elif marker == '-':
                 # Deletion
                 if current_change and current_change['type'] == 'deletion':
                     # Extend current deletion
-                    current_change['content'] += '\n' + line[1:]
+                    current_change['content'].append(line[1:])
                     current_change['old_end_line'] = old_line
                 else:
                     # Start new deletion
                     if current_change:
-                        changes.append(current_change)
+                        current_change['content'] = '\n'.join(current_change['content'])
+                        yield current_change
                     current_change = {
                         'type': 'deletion',
                         'old_start_line': old_line,
                         'old_end_line': old_line,
-                        'content': line[1:]
+                        'content': [line[1:]]
                     }
                 old_line += 1
                 
             else:
                 # Context line
                 if current_change:
-                    changes.append(current_change)
+                    current_change['content'] = '\n'.join(current_change['content'])
+                    yield current_change
                     current_change = None
                 
                 # Skip lines that start with \ (no newline at end of file)
-                if not line.startswith('\\'):
+                if marker != '\\':
                     old_line += 1
                     new_line += 1
         
         # Add the last change if there is one
         if current_change:
-            changes.append(current_change)
-            
-        return changes
\ No newline at end of file
+            current_change['content'] = '\n'.join(current_change['content'])
+            yield current_change
\ No newline at end of file
@@ -3,15 +3,13 @@ Main entry point for the Bitbucket Galaxy Code Review application.
 """
 
 import argparse
+import fnmatch
 import logging
+import posixpath
 import sys
-
-from galaxy_code_review.config import load_config
-from galaxy_code_review.bitbucket_api import BitbucketAPI
-from galaxy_code_review.diff_parser import DiffParser
-from galaxy_code_review.context_retriever import ContextRetriever
-from galaxy_code_review.reviewer_agent import ReviewerAgent
-from galaxy_code_review.comment_formatter import CommentFormatter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from operator import itemgetter
 
 # Configure logging
 logging.basicConfig(
@@ -21,6 +19,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of files reviewed at the same time, unless set by reviewer.concurrency
+DEFAULT_REVIEW_CONCURRENCY = 8
+
+# Changed content size (about 6k tokens) up to which files are grouped for
+# review, unless set by reviewer.batch_chars. A group's context is fetched
+# together, and the reviewer then splits it into requests of at most
+# reviewer.batch_prompt_chars of formatted prompt
+DEFAULT_BATCH_CHARS = 24000
+
+# Files of a batch whose context is fetched at the same time
+MAX_CONTEXT_WORKERS = 8
+
+# Generated files that are never worth reviewing; the exclude setting adds to these
+DEFAULT_EXCLUDE = (
+    '*.lock',
+    'package-lock.json',
+    'pnpm-lock.yaml',
+    '*.min.js',
+    '*.min.css',
+    '*.map'
+)
+
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -37,6 +57,96 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def is_excluded(file_path, patterns):
+    """
+    Check whether a changed file matches one of the exclude patterns.
+    
+    Patterns are matched against both the full path and the file name, so
+    that e.g. "package-lock.json" matches the file in any directory.
+    
+    Args:
+        file_path: Path to the file
+        patterns: Glob patterns of files to skip
+        
+    Returns:
+        True if the file should not be reviewed
+    """
+    file_name = posixpath.basename(file_path)
+    for pattern in patterns:
+        if fnmatch.fnmatch(file_path, pattern) or fnmatch.fnmatch(file_name, pattern):
+            logger.debug("Skipping %s (matches exclude pattern %s)", file_path, pattern)
+            return True
+    return False
+
+
+def batch_files(files, max_chars):
+    """
+    Group changed files into batches that are reviewed with one LLM request.
+    
+    Files are added to the current batch until their changed content would
+    exceed max_chars; larger files are reviewed on their own.
+    
+    Args:
+        files: Iterable of (file_path, changes) pairs
+        max_chars: Maximum total size of the changed content in a batch, or 0
+            to review every file on its own
+        
+    Yields:
+        Lists of (file_path, changes) pairs
+    """
+    batch = []
+    batch_chars = 0
+    for file_path, changes in files:
+        size = sum(len(change['content']) for change in changes)
+        if batch and (max_chars <= 0 or batch_chars + size > max_chars):
+            yield batch
+            batch = []
+            batch_chars = 0
+        
+        batch.append((file_path, changes))
+        batch_chars += size
+    
+    if batch:
+        yield batch
+
+
+def review_files(
+    repo_slug, 
+    pr_id, 
+    pr_info, 
+    files, 
+    bitbucket_api, 
+    context_retriever, 
+    reviewer_agent, 
+    comment_formatter
+):
+    """Retrieve context for a batch of changed files, review them and post the comments."""
+    def get_context(file_path):
+        logger.info("Reviewing changes in %s", file_path)
+        return context_retriever.get_context(repo_slug, pr_info, file_path)
+    
+    # Get the files' context concurrently; the fetches are independent and
+    # dominated by Bitbucket latency
+    with ThreadPoolExecutor(max_workers=min(MAX_CONTEXT_WORKERS, len(files))) as executor:
+        contexts = executor.map(get_context, [file_path for file_path, _ in files])
+        reviews = [(file_path, changes, context) for (file_path, changes), context in zip(files, contexts)]
+    
+    # Perform code review
+    review_comments = reviewer_agent.review_batch(reviews)
+    
+    # Format comments for Bitbucket, anchored to the file they were made on
+    formatted_comments = [
+        comment
+        for file_path, _ in files
+        for comment in comment_formatter.format(
+            dict(comment, file_path=file_path) for comment in review_comments.get(file_path, [])
+        )
+    ]
+    
+    # Post comments to Bitbucket
+    bitbucket_api.post_comments(repo_slug, pr_id, formatted_comments)
+
+
 def main():
     """Main function to run the code review process."""
     args = parse_arguments()
@@ -45,48 +155,83 @@ def main():
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    # Import the review pipeline only once the arguments are valid, so that
+    # --help and usage errors don't pay for loading requests, PyYAML and the
+    # OpenAI SDK
+    from galaxy_code_review.config import load_config
+    from galaxy_code_review.bitbucket_api import BitbucketAPI
+    from galaxy_code_review.diff_parser import DiffParser
+    from galaxy_code_review.context_retriever import ContextRetriever
+    from galaxy_code_review.reviewer_agent import ReviewerAgent
+    from galaxy_code_review.comment_formatter import CommentFormatter
+    
     try:
         # Load configuration
         config = load_config(args.config)
         
-        # Initialize components
-        bitbucket_api = BitbucketAPI(config)
-        diff_parser = DiffParser()
-        context_retriever = ContextRetriever(bitbucket_api)
-        reviewer_agent = ReviewerAgent(config)
-        comment_formatter = CommentFormatter()
-        
-        # Get pull request information
-        logger.info(f"Retrieving PR #{args.pr_id} from {args.repo}")
-        pr_info = bitbucket_api.get_pull_request(args.repo, args.pr_id)
-        
-        # Get diff from pull request
-        diff = bitbucket_api.get_pull_request_diff(args.repo, args.pr_id)
-        
-        # Parse diff to extract changed files and lines
-        changed_files = diff_parser.parse(diff)
-        
-        # For each changed file, retrieve context and perform review
-        for file_path, changes in changed_files.items():
-            logger.info(f"Reviewing changes in {file_path}")
-            
-            # Get file context
-            file_context = context_retriever.get_context(args.repo, pr_info, file_path)
+        # Initialize components; the API client and reviewer are closed when
+        # the review is done, releasing their connections and cache
+        with BitbucketAPI(config) as bitbucket_api, ReviewerAgent(config) as reviewer_agent:
+            diff_parser = DiffParser()
+            context_retriever = ContextRetriever(bitbucket_api)
+            comment_formatter = CommentFormatter()
             
-            # Perform code review
-            review_comments = reviewer_agent.review(file_path, changes, file_context)
+            # Get pull request information and request the diff at the same time;
+            # the two calls are independent
+            logger.info("Retrieving PR #%s from %s", args.pr_id, args.repo)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                pr_info_future = executor.submit(bitbucket_api.get_pull_request, args.repo, args.pr_id)
+                
+                # Stream the diff from the pull request; it is parsed one file at a
+                # time and never held in memory as a whole
+                diff_lines = bitbucket_api.get_pull_request_diff(args.repo, args.pr_id, stream=True)
+                
+                pr_info = pr_info_future.result()
             
-            # Format comments for Bitbucket
-            formatted_comments = comment_formatter.format(review_comments)
+            # Skip excluded files before any context is fetched for them
+            exclude = DEFAULT_EXCLUDE + tuple(config.get('exclude') or ())
+            changed_files = (
+                (file_path, [change for _, change in file_changes])
+                for file_path, file_changes in groupby(
+                    diff_parser.parse_iter(diff_lines), key=itemgetter(0)
+                )
+                if not is_excluded(file_path, exclude)
+            )
             
-            # Post comments to Bitbucket
-            for comment in formatted_comments:
-                bitbucket_api.post_comment(args.repo, args.pr_id, comment)
+            # Review the changed files as soon as they are parsed, packing small
+            # files into one LLM request. Reviews run concurrently; each is
+            # independent and dominated by Bitbucket and LLM latency
+            concurrency = config['reviewer'].get('concurrency', DEFAULT_REVIEW_CONCURRENCY)
+            batch_chars = config['reviewer'].get('batch_chars', DEFAULT_BATCH_CHARS)
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = [
+                    executor.submit(
+                        review_files, 
+                        args.repo, 
+                        args.pr_id, 
+                        pr_info, 
+                        files, 
+                        bitbucket_api, 
+                        context_retriever, 
+                        reviewer_agent, 
+                        comment_formatter
+                    )
+                    for files in batch_files(changed_files, batch_chars)
+                ]
+                
+                # Re-raise the first failure and skip files that haven't started
+                try:
+                    for future in futures:
+                        future.result()
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
         
         logger.info("Code review completed successfully")
         
     except Exception as e:
-        logger.error(f"Error during code review: {str(e)}")
+        logger.error("Error during code review: %s", e)
         if args.debug:
             logger.exception("Detailed error information:")
         return 1
@@ -2,16 +2,366 @@
 Reviewer Agent component that performs the actual code review using LLM.
 """
 
+import asyncio
+import functools
+import hashlib
+import importlib.util
+import json
 import logging
 import os
-from typing import Dict, List, Any, Optional
+import re
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 try:
-    import openai
+    import orjson
 except ImportError:
-    logger.warning("OpenAI package not installed. LLM-based review will not be available.")
+    orjson = None
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# Default limit on concurrent LLM requests in review_many
+MAX_CONCURRENT_REVIEWS = 5
+
+# LLM requests in flight across all agents in the process, unless set by
+# reviewer.max_concurrent_requests (matches main's default review concurrency)
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+
+# Seconds a cached LLM response is kept, unless set by reviewer.cache_ttl
+DEFAULT_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Rough prompt size estimate used for reviewer.tokens_per_minute
+CHARS_PER_TOKEN = 4
+
+# Connections kept open to the OpenAI API per client
+MAX_LLM_CONNECTIONS = 16
+
+# Retries of rate-limited (429) and failed (5xx) LLM requests, unless set by
+# reviewer.max_retries; the SDK backs off exponentially with jitter and
+# honours Retry-After
+DEFAULT_MAX_RETRIES = 5
+
+# HTTP/2 needs the optional h2 package; checked without importing it
+_HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+# Completion token budget for a review: a base allowance plus an allowance
+# per changed block, capped by reviewer.max_tokens
+DEFAULT_MAX_TOKENS = 2000
+BASE_REVIEW_TOKENS = 512
+TOKENS_PER_CHANGE = 128
+
+# Tokens left free when reviewer.context_window limits the budget, covering
+# the error in the CHARS_PER_TOKEN estimate of the prompt
+CONTEXT_WINDOW_MARGIN = 256
+
+# Files up to this many lines are sent whole, unless set by
+# reviewer.full_file_max_lines; larger files are cut down to the lines
+# around the changes
+DEFAULT_FULL_FILE_MAX_LINES = 300
+
+# Lines of file content kept on each side of a change, unless set by
+# reviewer.context_lines
+DEFAULT_CONTEXT_LINES = 40
+
+# Size of the file parts (changes and context) of a batch review prompt, about
+# 4k tokens, unless set by reviewer.batch_prompt_chars; more files are split
+# into further requests
+DEFAULT_BATCH_PROMPT_CHARS = 16000
+
+# Files with more changed code than this many characters are not reviewed,
+# unless set by reviewer.max_change_chars (typically generated or vendored code)
+DEFAULT_MAX_CHANGE_CHARS = 100000
+
+# Function and class definitions listed in the outline of cut-down files
+_OUTLINE_RE = re.compile(r'\s*(?:export\s+)?(?:async\s+)?(?:def|class|function)\s')
+
+# Trailing whitespace and carriage returns, ignored by the response cache key
+_TRAILING_SPACE_RE = re.compile(r'[ \t\r]+$', re.MULTILINE)
+
+# Optional sampling settings passed through from the reviewer configuration
+SAMPLING_OPTIONS = ('top_p', 'frequency_penalty', 'presence_penalty', 'seed')
+
+# Decoder used to pick the JSON array of review comments out of an LLM response
+_JSON_DECODER = json.JSONDecoder()
+
+# Static instructions of the review prompts, built once at import. They come
+# before the code so every request starts with the same text, which the API
+# can serve from its prompt cache
+_PROMPT_HEADER = """
+You are an expert code reviewer analyzing changes in a pull request.
+
+Your task is to review the code changes below and provide constructive feedback.
+
+"""
+
+_REVIEW_CHECKLIST = """Please analyze the code for:
+1. Bugs and logical errors
+2. Security vulnerabilities
+3. Performance issues
+4. Code style and best practices
+5. Potential edge cases
+6. Maintainability concerns
+
+For each issue you find, provide:
+"""
+
+_REVIEW_INSTRUCTIONS = _PROMPT_HEADER + _REVIEW_CHECKLIST + """- The line number(s) where the issue occurs
+- A clear explanation of the problem
+- A suggested fix or improvement
+- The severity (info, warning, or error)
+- The category of the issue (e.g., security, performance, style)
+
+Format your response as a JSON array of objects, where each object represents a review comment:
+[
+  {
+    "line": <line_number>,
+    "content": "<explanation and suggestion>",
+    "severity": "<info|warning|error>",
+    "category": "<category>"
+  },
+  ...
+]
+
+If you don't find any issues, return an empty array: []
+"""
+
+_BATCH_REVIEW_INSTRUCTIONS = _PROMPT_HEADER + _REVIEW_CHECKLIST + """- The file path, exactly as given above
+- The line number(s) where the issue occurs
+- A clear explanation of the problem
+- A suggested fix or improvement
+- The severity (info, warning, or error)
+- The category of the issue (e.g., security, performance, style)
+
+Format your response as a single JSON array of objects, where each object represents a review comment:
+[
+  {
+    "file": "<file path>",
+    "line": <line_number>,
+    "content": "<explanation and suggestion>",
+    "severity": "<info|warning|error>",
+    "category": "<category>"
+  },
+  ...
+]
+
+If you don't find any issues, return an empty array: []
+"""
+
+# JSON schemas for reviewer.structured_output, which makes the model return
+# {"comments": [...]} matching the schema instead of free text
+_COMMENT_PROPERTIES = {
+    'line': {'type': 'integer'},
+    'content': {'type': 'string'},
+    'severity': {'type': 'string', 'enum': ['info', 'warning', 'error']},
+    'category': {'type': 'string'}
+}
+
+
+def _comments_response_format(name: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a strict structured output response format for review comments.
+    
+    Args:
+        name: Name of the schema
+        properties: JSON schema properties of a comment
+        
+    Returns:
+        The response_format argument for the chat completion call
+    """
+    comment_schema = {
+        'type': 'object',
+        'properties': properties,
+        'required': list(properties),
+        'additionalProperties': False
+    }
+    return {
+        'type': 'json_schema',
+        'json_schema': {
+            'name': name,
+            'strict': True,
+            'schema': {
+                'type': 'object',
+                'properties': {'comments': {'type': 'array', 'items': comment_schema}},
+                'required': ['comments'],
+                'additionalProperties': False
+            }
+        }
+    }
+
+
+_REVIEW_RESPONSE_FORMAT = _comments_response_format('review_comments', _COMMENT_PROPERTIES)
+_BATCH_REVIEW_RESPONSE_FORMAT = _comments_response_format(
+    'batch_review_comments',
+    {'file': {'type': 'string'}, **_COMMENT_PROPERTIES}
+)
+
+# Language names for the code fences in review prompts, by file extension
+_EXTENSION_MAP: Mapping[str, str] = MappingProxyType({
+    'py': 'python',
+    'js': 'javascript',
+    'ts': 'typescript',
+    'java': 'java',
+    'go': 'go',
+    'rb': 'ruby',
+    'php': 'php',
+    'cs': 'csharp',
+    'cpp': 'cpp',
+    'c': 'c',
+    'h': 'c',
+    'hpp': 'cpp',
+    'html': 'html',
+    'css': 'css',
+    'md': 'markdown',
+    'json': 'json',
+    'yaml': 'yaml',
+    'yml': 'yaml',
+    'sh': 'bash',
+    'sql': 'sql'
+})
+
+
+@functools.lru_cache(maxsize=1)
+def _get_openai():
+    """
+    Import the OpenAI SDK on first use.
+    
+    The SDK is slow to import, so it is only loaded once a review is requested.
+    
+    Returns:
+        The openai module, or None if it is not installed
+    """
+    try:
+        import openai
+    except ImportError:
+        logger.warning("OpenAI package not installed. LLM-based review will not be available.")
+        return None
+    return openai
+
+
+# OpenAI clients shared by all agents, by (api_key, max_retries), and the
+# number of open agents using each key; a client is closed with its last agent
+_openai_clients: Dict[Tuple[Optional[str], int], Any] = {}
+_openai_client_users: Dict[Tuple[Optional[str], int], int] = {}
+_openai_clients_lock = threading.Lock()
+
+
+def _get_openai_client(api_key: Optional[str], max_retries: int) -> Any:
+    """
+    Get the OpenAI client for an API key, creating it on first use.
+    
+    Every agent using the same key shares one client and its connection pool,
+    which uses HTTP/2 when h2 is installed.
+    
+    Args:
+        api_key: OpenAI API key
+        max_retries: Number of times to retry rate-limited and failed requests
+        
+    Returns:
+        OpenAI client
+    """
+    with _openai_clients_lock:
+        client = _openai_clients.get((api_key, max_retries))
+        if client is None:
+            openai = _get_openai()
+            client = _openai_clients[(api_key, max_retries)] = openai.OpenAI(
+                api_key=api_key,
+                max_retries=max_retries,
+                http_client=openai.DefaultHttpxClient(
+                    http2=_HTTP2_AVAILABLE,
+                    limits=_llm_connection_limits()
+                )
+            )
+        return client
+
+
+def _acquire_openai_client(api_key: Optional[str], max_retries: int) -> None:
+    """
+    Register an agent as a user of the shared OpenAI client for an API key.
+    
+    Args:
+        api_key: OpenAI API key
+        max_retries: Number of times to retry rate-limited and failed requests
+    """
+    key = (api_key, max_retries)
+    with _openai_clients_lock:
+        _openai_client_users[key] = _openai_client_users.get(key, 0) + 1
+
+
+def _release_openai_client(api_key: Optional[str], max_retries: int) -> None:
+    """
+    Unregister a user of the shared OpenAI client for an API key.
+    
+    The client is closed once its last user is released, so requests other
+    agents have in flight keep their connections.
+    
+    Args:
+        api_key: OpenAI API key
+        max_retries: Number of times to retry rate-limited and failed requests
+    """
+    key = (api_key, max_retries)
+    with _openai_clients_lock:
+        users = _openai_client_users.get(key, 0) - 1
+        if users > 0:
+            _openai_client_users[key] = users
+            return
+        _openai_client_users.pop(key, None)
+        client = _openai_clients.pop(key, None)
+    if client is not None:
+        client.close()
+
+
+def _llm_connection_limits() -> Any:
+    """
+    Get the connection pool limits for OpenAI clients.
+    
+    Returns:
+        httpx.Limits allowing MAX_LLM_CONNECTIONS connections
+    """
+    import httpx
+    return httpx.Limits(max_connections=MAX_LLM_CONNECTIONS, max_keepalive_connections=MAX_LLM_CONNECTIONS)
+
+
+class _TokenBucket:
+    """
+    Leaky bucket limiting the rate of tokens requested from the LLM.
+    """
+    
+    def __init__(self, tokens_per_minute: int):
+        """
+        Initialize the bucket.
+        
+        Args:
+            tokens_per_minute: Tokens that may be requested per minute
+        """
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self._level = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve tokens for a request.
+        
+        Args:
+            tokens: Number of tokens the request may use
+            
+        Returns:
+            Seconds to wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._level = max(self._level - (now - self._last) * self.rate, 0.0)
+            self._last = now
+            self._level += tokens
+            return max(self._level - self.capacity, 0.0) / self.rate
 
 
 class ReviewerAgent:
@@ -19,6 +369,48 @@ class ReviewerAgent:
     LLM-powered component that performs code review.
     """
     
+    # Limit on LLM requests in flight, shared by every agent in the process
+    # so creating more agents doesn't raise the rate against the provider
+    _max_concurrent_requests: Optional[int] = None
+    _request_slots: Optional[threading.BoundedSemaphore] = None
+    _async_request_slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.BoundedSemaphore]] = None
+    _token_bucket: Optional[_TokenBucket] = None
+    
+    @classmethod
+    def set_concurrency(cls, max_concurrent_requests: int) -> None:
+        """
+        Set the limit on LLM requests in flight across all agents.
+        
+        Args:
+            max_concurrent_requests: Maximum number of concurrent LLM requests
+        """
+        cls._max_concurrent_requests = max_concurrent_requests
+        cls._request_slots = threading.BoundedSemaphore(max_concurrent_requests)
+        cls._async_request_slots = None
+    
+    @classmethod
+    def set_token_rate(cls, tokens_per_minute: Optional[int]) -> None:
+        """
+        Set the limit on LLM tokens requested per minute across all agents.
+        
+        Args:
+            tokens_per_minute: Maximum tokens per minute, or None for no limit
+        """
+        cls._token_bucket = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+    
+    @classmethod
+    def _get_async_request_slots(cls) -> asyncio.BoundedSemaphore:
+        """
+        Get the shared limit on LLM requests for the running event loop.
+        
+        Returns:
+            Semaphore allowing _max_concurrent_requests requests at a time
+        """
+        loop = asyncio.get_running_loop()
+        if cls._async_request_slots is None or cls._async_request_slots[0] is not loop:
+            cls._async_request_slots = (loop, asyncio.BoundedSemaphore(cls._max_concurrent_requests))
+        return cls._async_request_slots[1]
+    
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize the reviewer agent.
@@ -29,16 +421,104 @@ class ReviewerAgent:
         self.config = config
         self.model = config['reviewer']['model']
         self.temperature = config['reviewer']['temperature']
+        self.max_tokens = config['reviewer'].get('max_tokens', DEFAULT_MAX_TOKENS)
+        self.context_window = config['reviewer'].get('context_window')
+        self.full_file_max_lines = config['reviewer'].get('full_file_max_lines', DEFAULT_FULL_FILE_MAX_LINES)
+        self.context_lines = config['reviewer'].get('context_lines', DEFAULT_CONTEXT_LINES)
+        self.max_change_chars = config['reviewer'].get('max_change_chars', DEFAULT_MAX_CHANGE_CHARS)
+        self.batch_prompt_chars = config['reviewer'].get('batch_prompt_chars', DEFAULT_BATCH_PROMPT_CHARS)
+        self.max_retries = config['reviewer'].get('max_retries', DEFAULT_MAX_RETRIES)
+        self.cache_ttl = config['reviewer'].get('cache_ttl', DEFAULT_CACHE_TTL)
+        self.structured_output = config['reviewer'].get('structured_output', False)
+        self.sampling_params = {
+            option: config['reviewer'][option]
+            for option in SAMPLING_OPTIONS
+            if option in config['reviewer']
+        }
         
-        # Initialize OpenAI client if API key is available
-        api_key = os.environ.get('OPENAI_API_KEY') or config.get('reviewer', {}).get('api_key')
-        if api_key:
-            try:
-                openai.api_key = api_key
-            except NameError:
-                logger.error("OpenAI package not installed. Please install it with 'pip install openai'")
-        else:
+        self.api_key = os.environ.get('OPENAI_API_KEY') or config.get('reviewer', {}).get('api_key')
+        if not self.api_key:
             logger.warning("No OpenAI API key provided. LLM-based review will not be available.")
+        
+        # The OpenAI client is shared with other agents using the same key and
+        # stays open until the last of them is closed
+        _acquire_openai_client(self.api_key, self.max_retries)
+        self._closed = False
+        
+        # The first agent sets the process-wide limits unless set_concurrency
+        # was called already
+        if ReviewerAgent._request_slots is None:
+            ReviewerAgent.set_concurrency(
+                config['reviewer'].get('max_concurrent_requests', DEFAULT_MAX_CONCURRENT_REQUESTS)
+            )
+            ReviewerAgent.set_token_rate(config['reviewer'].get('tokens_per_minute'))
+        
+        # Without a key or the SDK every review would come back empty, so
+        # reviews are skipped before any prompt is built
+        self._enabled = bool(self.api_key) and importlib.util.find_spec('openai') is not None
+        if self.api_key and not self._enabled:
+            logger.warning("OpenAI package not installed. LLM-based review will not be available.")
+        
+        # Optional on-disk cache of LLM responses, so reviewing an unchanged
+        # diff again (re-runs, CI replays) doesn't pay for the same request
+        self._response_cache = None
+        cache_dir = config['reviewer'].get('cache_dir')
+        if cache_dir:
+            if diskcache is None:
+                logger.warning("diskcache package not installed. LLM responses will not be cached.")
+            else:
+                self._response_cache = diskcache.Cache(cache_dir)
+        
+        # The async client is created on the first async review, so the OpenAI
+        # SDK doesn't have to be imported until then, and reused so its
+        # connection pool is kept alive across reviews
+        self._async_client = None
+        self._async_client_loop = None
+        self._closing_tasks = set()
+    
+    def close(self) -> None:
+        """
+        Release the agent's clients, pooled connections and response cache.
+        
+        The shared OpenAI client is closed once no other open agent uses it.
+        The async client can only be closed on its event loop, so it is just
+        dropped here; use aclose to close it as well.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        
+        self._async_client = None
+        self._async_client_loop = None
+        _release_openai_client(self.api_key, self.max_retries)
+        if self._response_cache is not None:
+            self._response_cache.close()
+    
+    def __enter__(self) -> 'ReviewerAgent':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    async def aclose(self) -> None:
+        """
+        Release the agent's clients, pooled connections and response cache.
+        
+        Like close, but the async client is closed first. Call it from the
+        event loop the agent's async reviews ran on.
+        """
+        async_client = self._async_client
+        if async_client is not None:
+            self._async_client = None
+            self._async_client_loop = None
+            await async_client.close()
+        self.close()
+    
+    async def __aenter__(self) -> 'ReviewerAgent':
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
     
     def review(
         self, 
@@ -61,6 +541,43 @@ class ReviewerAgent:
             - severity: 'info', 'warning', or 'error'
             - category: Category of the issue (e.g., 'security', 'performance')
         """
+        if not self._enabled:
+            return []
+        changes = self._reviewable_changes(file_path, changes)
+        if not changes:
+            return []
+        
+        # Prepare the prompt for the LLM
+        prompt = self._prepare_review_prompt(file_path, changes, context)
+        
+        # Get review comments from LLM
+        try:
+            review_comments = self._get_llm_review(prompt, self._max_tokens_for(len(changes), prompt))
+            return self._parse_llm_response(review_comments)
+        except Exception as e:
+            logger.error(f"Error during LLM review: {str(e)}")
+            return []
+    
+    async def review_async(
+        self, 
+        file_path: str, 
+        changes: List[Dict[str, Any]], 
+        context: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Asynchronously review code changes and provide feedback.
+        
+        Args:
+            file_path: Path to the file being reviewed
+            changes: List of change objects from the diff parser
+            context: Context information from the context retriever
+            
+        Returns:
+            List of review comment objects, as returned by review
+        """
+        if not self._enabled:
+            return []
+        changes = self._reviewable_changes(file_path, changes)
         if not changes:
             return []
         
@@ -69,12 +586,173 @@ class ReviewerAgent:
         
         # Get review comments from LLM
         try:
-            review_comments = self._get_llm_review(prompt)
+            review_comments = await self._aget_llm_review(prompt, self._max_tokens_for(len(changes), prompt))
             return self._parse_llm_response(review_comments)
         except Exception as e:
             logger.error(f"Error during LLM review: {str(e)}")
             return []
     
+    async def review_many(
+        self, 
+        files: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]], 
+        max_concurrency: int = MAX_CONCURRENT_REVIEWS
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Asynchronously review several files, one LLM request per file.
+        
+        Up to max_concurrency requests are in flight at the same time.
+        
+        Args:
+            files: (file_path, changes, context) for each file, as passed to review
+            max_concurrency: Maximum number of concurrent LLM requests
+            
+        Returns:
+            Dictionary mapping each file path to its review comments
+        """
+        slots = asyncio.Semaphore(max_concurrency)
+        
+        async def review_one(file_path, changes, context):
+            async with slots:
+                return await self.review_async(file_path, changes, context)
+        
+        results = await asyncio.gather(*(review_one(*file) for file in files))
+        return {file[0]: comments for file, comments in zip(files, results)}
+    
+    def review_batch(
+        self, 
+        files: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Review the changes of several files with as few LLM requests as possible.
+        
+        Packing small files into one request saves a model round trip per file.
+        Files are packed by the size of their part of the prompt, including
+        file content, so a batch that is too large for one request is split.
+        
+        Args:
+            files: (file_path, changes, context) for each file, as passed to review
+            
+        Returns:
+            Dictionary mapping each file path to its review comments, in the
+            same format as returned by review
+        """
+        files = [(file_path, changes, context) for file_path, changes, context in files if changes]
+        result = {file_path: [] for file_path, _, _ in files}
+        if not self._enabled:
+            return result
+        
+        # Format each file's part of the prompt and pack the parts into
+        # requests by their size, so file content doesn't overflow the prompt
+        sections = []
+        for file_path, changes, context in files:
+            changes = self._reviewable_changes(file_path, changes)
+            if changes:
+                sections.append((file_path, changes, context, self._format_batch_file(file_path, changes, context)))
+        
+        for group in self._pack_batch(sections):
+            if len(group) == 1:
+                file_path, changes, context, _ = group[0]
+                result[file_path] = self.review(file_path, changes, context)
+            else:
+                result.update(self._review_group(group))
+        
+        return result
+    
+    def _pack_batch(
+        self, 
+        sections: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any], str]]
+    ) -> List[List[Tuple[str, List[Dict[str, Any]], Dict[str, Any], str]]]:
+        """
+        Group formatted files into requests of at most batch_prompt_chars.
+        
+        Args:
+            sections: (file_path, changes, context, file_text) for each file
+            
+        Returns:
+            Groups of sections, in their original order
+        """
+        groups = []
+        group = []
+        group_chars = 0
+        for section in sections:
+            size = len(section[3])
+            if group and group_chars + size > self.batch_prompt_chars:
+                groups.append(group)
+                group = []
+                group_chars = 0
+            group.append(section)
+            group_chars += size
+        
+        if group:
+            groups.append(group)
+        return groups
+    
+    def _review_group(
+        self, 
+        group: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any], str]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Review a group of formatted files with one LLM request.
+        
+        Args:
+            group: (file_path, changes, context, file_text) for each file
+            
+        Returns:
+            Dictionary mapping each file path to its review comments
+        """
+        # Prepare the prompt for the LLM
+        prompt = self._prepare_batch_review_prompt(group)
+        
+        result = {file_path: [] for file_path, _, _, _ in group}
+        
+        # Get review comments from LLM
+        try:
+            max_tokens = self._max_tokens_for(sum(len(changes) for _, changes, _, _ in group), prompt)
+            review_comments = self._parse_llm_response(self._get_llm_review(prompt, max_tokens, batch=True))
+        except Exception as e:
+            logger.error(f"Error during LLM review: {str(e)}")
+            return result
+        
+        # Route each comment back to the file it refers to
+        for comment in review_comments:
+            file_path = comment.pop('file', None)
+            if file_path in result:
+                result[file_path].append(comment)
+            else:
+                logger.warning(f"Dropping review comment for unknown file: {file_path}")
+        
+        return result
+    
+    def _reviewable_changes(
+        self, 
+        file_path: str, 
+        changes: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Drop the changes that aren't worth sending to the LLM.
+        
+        Whitespace-only changes are dropped, and files with more changed
+        code than max_change_chars are skipped entirely.
+        
+        Args:
+            file_path: Path to the file being reviewed
+            changes: List of change objects from the diff parser
+            
+        Returns:
+            The changes to review, empty if the file should not be reviewed
+        """
+        changes = [change for change in changes if change['content'].strip()]
+        
+        change_chars = sum(len(change['content']) for change in changes)
+        if change_chars > self.max_change_chars:
+            logger.info(
+                "Skipping review of %s: %d characters of changes exceed max_change_chars",
+                file_path, change_chars
+            )
+            return []
+        
+        return changes
+    
     def _prepare_review_prompt(
         self, 
         file_path: str, 
@@ -92,76 +770,233 @@ class ReviewerAgent:
         Returns:
             Formatted prompt string
         """
-        file_extension = file_path.split('.')[-1] if '.' in file_path else ''
-        language = self._get_language_from_extension(file_extension)
+        language = self._get_language_from_path(file_path)
         
         # Format the changes for the prompt
-        changes_text = ""
-        for change in changes:
-            if change['type'] == 'addition':
-                line_range = f"Lines {change['start_line']}-{change['end_line']}"
-                changes_text += f"\n{line_range} (Added):\n```{language}\n{change['content']}\n```\n"
-            elif change['type'] == 'deletion':
-                line_range = f"Lines {change.get('old_start_line', '?')}-{change.get('old_end_line', '?')}"
-                changes_text += f"\n{line_range} (Removed):\n```{language}\n{change['content']}\n```\n"
+        changes_text = self._format_changes(changes, language)
         
         # Include relevant context
-        context_text = ""
-        if context.get('file_content'):
-            context_text += f"\nFull file content:\n```{language}\n{context['file_content']}\n```\n"
+        context_text = self._format_context(context, changes, language)
+        
+        # Build the complete prompt
+        return "".join([
+            _REVIEW_INSTRUCTIONS,
+            f"\nFile: {file_path}\nLanguage: {language}\n\n",
+            "Code changes:\n",
+            changes_text,
+            "\n\nAdditional context:\n",
+            context_text
+        ])
+    
+    def _prepare_batch_review_prompt(
+        self, 
+        group: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any], str]]
+    ) -> str:
+        """
+        Prepare a prompt covering the changes of several files.
         
-        if context.get('imports'):
-            context_text += "\nImports:\n"
-            for imp in context['imports']:
-                context_text += f"- {imp}\n"
+        The pull request description is the same for every file, so it is
+        included once rather than in each file's context.
+        
+        Args:
+            group: (file_path, changes, context, file_text) for each file, with
+                file_text as returned by _format_batch_file
+            
+        Returns:
+            Formatted prompt string
+        """
+        parts = [_BATCH_REVIEW_INSTRUCTIONS]
+        pr_description = next(
+            (context['pr_description'] for _, _, context, _ in group if context.get('pr_description')),
+            None
+        )
+        if pr_description:
+            parts.append(f"\nPull Request Description:\n{pr_description}\n")
         
-        if context.get('pr_description'):
-            context_text += f"\nPull Request Description:\n{context['pr_description']}\n"
+        parts.append(f"\nCode changes in {len(group)} files:\n")
+        parts.extend(file_text for _, _, _, file_text in group)
         
         # Build the complete prompt
-        prompt = f"""
-You are an expert code reviewer analyzing changes in a pull request.
-
+        return "".join(parts)
+    
+    def _format_batch_file(
+        self, 
+        file_path: str, 
+        changes: List[Dict[str, Any]], 
+        context: Dict[str, Any]
+    ) -> str:
+        """
+        Format one file's part of a batch review prompt.
+        
+        Args:
+            file_path: Path to the file being reviewed
+            changes: List of change objects
+            context: Context information; the pull request description is
+                left out
+            
+        Returns:
+            Formatted file text
+        """
+        language = self._get_language_from_path(file_path)
+        return f"""
 File: {file_path}
 Language: {language}
 
-Your task is to review the following code changes and provide constructive feedback:
-{changes_text}
+Changes:
+{self._format_changes(changes, language)}
 
 Additional context:
-{context_text}
-
-Please analyze the code for:
-1. Bugs and logical errors
-2. Security vulnerabilities
-3. Performance issues
-4. Code style and best practices
-5. Potential edge cases
-6. Maintainability concerns
-
-For each issue you find, provide:
-- The line number(s) where the issue occurs
-- A clear explanation of the problem
-- A suggested fix or improvement
-- The severity (info, warning, or error)
-- The category of the issue (e.g., security, performance, style)
-
-Format your response as a JSON array of objects, where each object represents a review comment:
-[
-  {{
-    "line": <line_number>,
-    "content": "<explanation and suggestion>",
-    "severity": "<info|warning|error>",
-    "category": "<category>"
-  }},
-  ...
-]
-
-If you don't find any issues, return an empty array: []
+{self._format_context(context, changes, language, include_description=False)}
 """
-        return prompt
     
-    def _get_language_from_extension(self, extension: str) -> str:
+    def _format_changes(self, changes: List[Dict[str, Any]], language: str) -> str:
+        """
+        Format change objects as prompt text.
+        
+        Args:
+            changes: List of change objects
+            language: Language name used for the code fences
+            
+        Returns:
+            Formatted changes
+        """
+        parts = []
+        fence = f"```{language}\n"
+        for change in changes:
+            change_type = change['type']
+            if change_type == 'addition':
+                start, end, kind = change['start_line'], change['end_line'], 'Added'
+            elif change_type == 'deletion':
+                start, end, kind = change.get('old_start_line', '?'), change.get('old_end_line', '?'), 'Removed'
+            else:
+                continue
+            parts.append(f"\nLines {start}-{end} ({kind}):\n{fence}{change['content']}\n```\n")
+        
+        return "".join(parts)
+    
+    def _format_context(
+        self, 
+        context: Dict[str, Any], 
+        changes: List[Dict[str, Any]], 
+        language: str,
+        include_description: bool = True
+    ) -> str:
+        """
+        Format file context as prompt text.
+        
+        Args:
+            context: Context information
+            changes: List of change objects the context is for
+            language: Language name used for the code fences
+            include_description: Whether to include the pull request description
+            
+        Returns:
+            Formatted context
+        """
+        parts = []
+        file_content = context.get('file_content')
+        if file_content:
+            parts.extend(self._format_file_content(file_content, changes, language))
+        
+        imports = context.get('imports')
+        if imports:
+            parts.append("\nImports:\n")
+            parts.extend(f"- {imp}\n" for imp in imports)
+        
+        pr_description = context.get('pr_description') if include_description else None
+        if pr_description:
+            parts.append(f"\nPull Request Description:\n{pr_description}\n")
+        
+        return "".join(parts)
+    
+    def _format_file_content(
+        self, 
+        file_content: str, 
+        changes: List[Dict[str, Any]], 
+        language: str
+    ) -> List[str]:
+        """
+        Format the content of the changed file as prompt text.
+        
+        Large files are cut down to the lines around the added code, so the
+        prompt isn't dominated by unchanged code, followed by an outline of
+        the function and class definitions in the lines left out. Small
+        files, and files with only deletions, are sent whole.
+        
+        Args:
+            file_content: Current content of the file
+            changes: List of change objects
+            language: Language name used for the code fences
+            
+        Returns:
+            Prompt text parts
+        """
+        lines = file_content.splitlines()
+        windows = sorted(
+            (max(change['start_line'] - self.context_lines, 1), change['end_line'] + self.context_lines)
+            for change in changes
+            if change['type'] == 'addition' and change['start_line'] <= len(lines)
+        )
+        if len(lines) <= self.full_file_max_lines or not windows:
+            return [f"\nFull file content:\n```{language}\n{file_content}\n```\n"]
+        
+        # Merge overlapping windows
+        merged = [list(windows[0])]
+        for start, end in windows[1:]:
+            if start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        
+        parts = [f"\nFile content around the changes ({len(lines)} lines in total):\n"]
+        outline = []
+        previous_end = 0
+        for start, end in merged:
+            end = min(end, len(lines))
+            outline.extend(self._outline(lines, previous_end, start - 1))
+            excerpt = "\n".join(lines[start - 1:end])
+            parts.append(f"\nLines {start}-{end}:\n```{language}\n{excerpt}\n```\n")
+            previous_end = end
+        outline.extend(self._outline(lines, previous_end, len(lines)))
+        
+        if outline:
+            parts.append("\nDefinitions elsewhere in the file:\n")
+            parts.extend(outline)
+        return parts
+    
+    def _outline(self, lines: List[str], start: int, end: int) -> List[str]:
+        """
+        List the function and class definitions in a range of lines.
+        
+        Args:
+            lines: Lines of the file
+            start: Number of lines to skip
+            end: Last line number to include
+            
+        Returns:
+            Outline entries, one line each
+        """
+        return [
+            f"- Line {number}: {lines[number - 1].strip()}\n"
+            for number in range(start + 1, end + 1)
+            if _OUTLINE_RE.match(lines[number - 1])
+        ]
+    
+    def _get_language_from_path(self, file_path: str) -> str:
+        """
+        Determine the language of a file from its extension.
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            Language name
+        """
+        _, dot, file_extension = file_path.rpartition('.')
+        return self._get_language_from_extension(file_extension if dot else '')
+    
+    @staticmethod
+    def _get_language_from_extension(extension: str) -> str:
         """
         Map file extension to language name.
         
@@ -171,37 +1006,16 @@ If you don't find any issues, return an empty array: []
         Returns:
             Language name
         """
-        extension_map = {
-            'py': 'python',
-            'js': 'javascript',
-            'ts': 'typescript',
-            'java': 'java',
-            'go': 'go',
-            'rb': 'ruby',
-            'php': 'php',
-            'cs': 'csharp',
-            'cpp': 'cpp',
-            'c': 'c',
-            'h': 'c',
-            'hpp': 'cpp',
-            'html': 'html',
-            'css': 'css',
-            'md': 'markdown',
-            'json': 'json',
-            'yaml': 'yaml',
-            'yml': 'yaml',
-            'sh': 'bash',
-            'sql': 'sql'
-        }
-        
-        return extension_map.get(extension.lower(), 'text')
+        return _EXTENSION_MAP.get(extension.lower(), 'text')
     
-    def _get_llm_review(self, prompt: str) -> str:
+    def _get_llm_review(self, prompt: str, max_tokens: int, batch: bool = False) -> str:
         """
         Get review comments from the LLM.
         
         Args:
             prompt: Formatted prompt string
+            max_tokens: Maximum number of tokens to generate
+            batch: Whether the prompt covers several files
             
         Returns:
             LLM response as a string
@@ -209,26 +1023,259 @@ If you don't find any issues, return an empty array: []
         Raises:
             Exception: If the LLM request fails
         """
+        openai = _get_openai()
+        if openai is None:
+            # OpenAI package not installed, return mock response for testing
+            logger.warning("Using mock LLM response because OpenAI package is not installed")
+            return "[]"
+        
         try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert code reviewer providing detailed, actionable feedback."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature,
-                max_tokens=2000
-            )
+            params = self._completion_params(prompt, max_tokens, batch)
+            cache_key, cached = self._cached_response(params)
+            if cached is not None:
+                return cached
             
-            return response.choices[0].message.content
-        except NameError:
+            delay = self._token_delay(prompt, max_tokens)
+            if delay:
+                time.sleep(delay)
+            
+            with self._request_slots:
+                response = _get_openai_client(self.api_key, self.max_retries).chat.completions.create(**params)
+            
+            return self._response_content(response, cache_key, max_tokens)
+        except Exception as e:
+            logger.error(f"Error calling LLM API: {str(e)}")
+            raise
+    
+    async def _aget_llm_review(self, prompt: str, max_tokens: int) -> str:
+        """
+        Asynchronously get review comments from the LLM.
+        
+        Args:
+            prompt: Formatted prompt string
+            max_tokens: Maximum number of tokens to generate
+            
+        Returns:
+            LLM response as a string
+            
+        Raises:
+            Exception: If the LLM request fails
+        """
+        openai = _get_openai()
+        if openai is None:
             # OpenAI package not installed, return mock response for testing
             logger.warning("Using mock LLM response because OpenAI package is not installed")
             return "[]"
+        
+        try:
+            params = self._completion_params(prompt, max_tokens)
+            cache_key, cached = self._cached_response(params)
+            if cached is not None:
+                return cached
+            
+            delay = self._token_delay(prompt, max_tokens)
+            if delay:
+                await asyncio.sleep(delay)
+            
+            async with self._get_async_request_slots():
+                response = await self._get_async_client(openai).chat.completions.create(**params)
+            
+            return self._response_content(response, cache_key, max_tokens)
         except Exception as e:
             logger.error(f"Error calling LLM API: {str(e)}")
             raise
     
+    def _cached_response(self, params: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up the cached response to a chat completion request.
+        
+        Args:
+            params: Keyword arguments for the chat completion call
+            
+        Returns:
+            The request's cache key and its cached response; the key is None
+            if responses aren't cached, the response None on a cache miss
+        """
+        cache_key = self._response_cache_key(params)
+        if cache_key is None:
+            return None, None
+        return cache_key, self._response_cache.get(cache_key)
+    
+    def _response_content(self, response: Any, cache_key: Optional[str], max_tokens: int) -> str:
+        """
+        Get the text of a chat completion and cache it if it is complete.
+        
+        Args:
+            response: Chat completion returned by the OpenAI client
+            cache_key: Cache key of the request, or None if responses aren't cached
+            max_tokens: Maximum number of tokens the request allowed
+            
+        Returns:
+            LLM response as a string
+        """
+        choice = response.choices[0]
+        content = choice.message.content
+        if choice.finish_reason == 'length':
+            # A truncated response is not cached, so the next run asks again
+            logger.warning("LLM response was cut off at %d tokens", max_tokens)
+        elif cache_key is not None and content is not None:
+            self._response_cache.set(cache_key, content, expire=self.cache_ttl)
+        return content
+    
+    def _response_cache_key(self, params: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the response cache key of a chat completion request.
+        
+        The key covers the whole request (model, sampling settings, system
+        and user messages), so only identical requests share a response.
+        Trailing whitespace in the messages is ignored, so a diff that only
+        differs in line endings or trailing spaces reuses the response.
+        
+        Args:
+            params: Keyword arguments for the chat completion call
+            
+        Returns:
+            Cache key, or None if responses aren't cached
+        """
+        if self._response_cache is None:
+            return None
+        messages = [
+            dict(message, content=_TRAILING_SPACE_RE.sub('', message['content']))
+            for message in params['messages']
+        ]
+        request = json.dumps(dict(params, messages=messages), sort_keys=True).encode('utf-8')
+        return hashlib.blake2b(request, digest_size=16).hexdigest()
+    
+    def _token_delay(self, prompt: str, max_tokens: int) -> float:
+        """
+        Reserve the tokens of a request against the tokens-per-minute limit.
+        
+        Args:
+            prompt: Formatted prompt string
+            max_tokens: Maximum number of tokens to generate
+            
+        Returns:
+            Seconds to wait before sending the request
+        """
+        token_bucket = self._token_bucket
+        if token_bucket is None:
+            return 0.0
+        return token_bucket.reserve(len(prompt) // CHARS_PER_TOKEN + max_tokens)
+    
+    def _get_async_client(self, openai) -> Any:
+        """
+        Get the asynchronous OpenAI client for the running event loop.
+        
+        The client's connections belong to the event loop they were opened on,
+        so a new client is created when the agent is used from another loop.
+        
+        Args:
+            openai: The openai module
+            
+        Returns:
+            AsyncOpenAI client shared by all asynchronous reviews on this loop
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            if self._async_client is not None:
+                self._discard_async_client(self._async_client, self._async_client_loop, loop)
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                max_retries=self.max_retries,
+                http_client=openai.DefaultAsyncHttpxClient(
+                    http2=_HTTP2_AVAILABLE,
+                    limits=_llm_connection_limits()
+                )
+            )
+            self._async_client_loop = loop
+        return self._async_client
+    
+    def _discard_async_client(
+        self, 
+        async_client: Any, 
+        client_loop: asyncio.AbstractEventLoop, 
+        loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """
+        Close an async client left behind when the agent moves to another loop.
+        
+        The client is closed on its own loop if that loop is still running,
+        otherwise on the running loop, so its connection pool isn't leaked.
+        
+        Args:
+            async_client: AsyncOpenAI client of the previous event loop
+            client_loop: Event loop the client was created on
+            loop: Running event loop
+        """
+        async def close_quietly():
+            try:
+                await async_client.close()
+            except Exception as e:
+                logger.debug("Failed to close async OpenAI client: %s", e)
+        
+        if client_loop.is_running():
+            asyncio.run_coroutine_threadsafe(close_quietly(), client_loop)
+        else:
+            task = loop.create_task(close_quietly())
+            # Keep a reference so the task isn't garbage-collected unfinished
+            self._closing_tasks.add(task)
+            task.add_done_callback(self._closing_tasks.discard)
+    
+    def _max_tokens_for(self, num_changes: int, prompt: str = '') -> int:
+        """
+        Size the completion token budget for a review.
+        
+        When reviewer.context_window is set, the budget is also limited to
+        the room the prompt leaves in the model's context window.
+        
+        Args:
+            num_changes: Number of changed blocks being reviewed
+            prompt: Formatted prompt string
+            
+        Returns:
+            Maximum number of tokens to generate
+            
+        Raises:
+            ValueError: If the prompt leaves no room in the context window
+        """
+        max_tokens = min(self.max_tokens, BASE_REVIEW_TOKENS + TOKENS_PER_CHANGE * num_changes)
+        if self.context_window:
+            prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+            room = self.context_window - prompt_tokens - CONTEXT_WINDOW_MARGIN
+            if room <= 0:
+                raise ValueError(
+                    f"Prompt of about {prompt_tokens} tokens doesn't fit the "
+                    f"{self.context_window}-token context window; skipping review"
+                )
+            max_tokens = min(max_tokens, room)
+        return max_tokens
+    
+    def _completion_params(self, prompt: str, max_tokens: int, batch: bool = False) -> Dict[str, Any]:
+        """
+        Build the chat completion request for a review prompt.
+        
+        Args:
+            prompt: Formatted prompt string
+            max_tokens: Maximum number of tokens to generate
+            batch: Whether the prompt covers several files
+            
+        Returns:
+            Keyword arguments for the chat completion call
+        """
+        params = {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": "You are an expert code reviewer providing detailed, actionable feedback."},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': self.temperature,
+            'max_tokens': max_tokens,
+            **self.sampling_params
+        }
+        if self.structured_output:
+            params['response_format'] = _BATCH_REVIEW_RESPONSE_FORMAT if batch else _REVIEW_RESPONSE_FORMAT
+        return params
+    
     def _parse_llm_response(self, response: str) -> List[Dict[str, Any]]:
         """
         Parse the LLM response into structured review comments.
@@ -239,35 +1286,136 @@ If you don't find any issues, return an empty array: []
         Returns:
             List of review comment objects
         """
-        import json
-        
         try:
-            # Extract JSON array from response (in case there's additional text)
-            import re
-            json_match = re.search(r'\[[\s\S]*\]', response)
-            if json_match:
-                json_str = json_match.group(0)
-                comments = json.loads(json_str)
-                
-                # Validate and clean up comments
-                valid_comments = []
-                for comment in comments:
-                    if 'line' in comment and 'content' in comment:
-                        # Ensure required fields are present
-                        if 'severity' not in comment:
-                            comment['severity'] = 'info'
-                        if 'category' not in comment:
-                            comment['category'] = 'general'
-                        
-                        valid_comments.append(comment)
-                
-                return valid_comments
+            # Extract JSON array from response (in case there's additional text).
+            # Structured output and batch reviews keyed by file path come back
+            # as an object holding the arrays; an object is only used when it
+            # encloses the first array, or when there is no array at all
+            comments = None
+            array = self._find_json_array(response)
+            comments_by_file = self._find_comments_by_file(response)
+            if comments_by_file is not None and (
+                array is None or comments_by_file[1] < array[1] < comments_by_file[2]
+            ):
+                comments = comments_by_file[0]
+            elif array is not None:
+                comments = array[0]
+            if comments is not None:
+                # Keep the comments with the required fields and fill in the rest
+                return [
+                    {'severity': 'info', 'category': 'general', **comment}
+                    for comment in comments
+                    if isinstance(comment, dict) and 'line' in comment and 'content' in comment
+                ]
             else:
                 logger.warning("No valid JSON array found in LLM response")
                 return []
-        except json.JSONDecodeError:
-            logger.error("Failed to parse LLM response as JSON")
-            return []
         except Exception as e:
             logger.error(f"Error parsing LLM response: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+    
+    def _find_comments_by_file(self, response: str) -> Optional[Tuple[List[Any], int, int]]:
+        """
+        Find review comments given as a JSON object.
+        
+        The object is either the {"comments": [...]} of structured output or
+        keyed by file path. In the latter case each comment is tagged with its
+        file, as if the model had returned an array with a "file" field on
+        every comment. Other objects, e.g. examples in surrounding prose, are
+        skipped. A response that is nothing but the object, as structured
+        output always is, is decoded with orjson when it is installed.
+        
+        Args:
+            response: LLM response string
+            
+        Returns:
+            The comments and the start and end offsets of the object, or None
+            if the response contains no such object
+        """
+        if orjson is not None:
+            stripped = response.strip()
+            if stripped.startswith('{') and stripped.endswith('}'):
+                try:
+                    comments = self._comments_from_object(orjson.loads(stripped))
+                except orjson.JSONDecodeError:
+                    comments = None
+                if comments is not None:
+                    start = response.find('{')
+                    return comments, start, start + len(stripped)
+        
+        start = response.find('{')
+        while start != -1:
+            try:
+                value, end = _JSON_DECODER.raw_decode(response, start)
+            except json.JSONDecodeError:
+                start = response.find('{', start + 1)
+                continue
+            comments = self._comments_from_object(value)
+            if comments is not None:
+                return comments, start, end
+            start = response.find('{', end)
+        return None
+    
+    def _comments_from_object(self, value: Dict[str, Any]) -> Optional[List[Any]]:
+        """
+        Get the review comments held by a decoded JSON object.
+        
+        Args:
+            value: Decoded JSON object
+            
+        Returns:
+            The comments, or None if the object doesn't hold review comments
+        """
+        # Structured output wraps the comments in a "comments" field
+        if list(value) == ['comments'] and isinstance(value['comments'], list):
+            return value['comments']
+        
+        if not value or not all(isinstance(comments, list) for comments in value.values()):
+            return None
+        
+        return [
+            dict(comment, file=file_path)
+            for file_path, comments in value.items()
+            for comment in comments
+            if isinstance(comment, dict)
+        ]
+    
+    def _find_json_array(self, response: str) -> Optional[Tuple[List[Any], int]]:
+        """
+        Find the first JSON array of review comments in the LLM response.
+        
+        A response that is nothing but the array is decoded with orjson when
+        it is installed. Otherwise each '[' is tried in turn and decoded in a
+        single pass, which stops at the end of the array, so brackets in
+        surrounding prose are skipped. The first array holding a comment is
+        preferred over arrays in examples, e.g. "[1]" or an empty list.
+        
+        Args:
+            response: LLM response string
+            
+        Returns:
+            The decoded array and its start offset, or None if the response
+            contains no JSON array
+        """
+        if orjson is not None:
+            stripped = response.strip()
+            if stripped.startswith('[') and stripped.endswith(']'):
+                try:
+                    return orjson.loads(stripped), response.find('[')
+                except orjson.JSONDecodeError:
+                    pass
+        
+        first = None
+        start = response.find('[')
+        while start != -1:
+            try:
+                value, end = _JSON_DECODER.raw_decode(response, start)
+            except json.JSONDecodeError:
+                start = response.find('[', start + 1)
+                continue
+            if any(isinstance(item, dict) and 'line' in item and 'content' in item for item in value):
+                return value, start
+            if first is None:
+                first = value, start
+            start = response.find('[', end)
+        return first
@@ -0,0 +1,102 @@
+"""
+Tests for the BitbucketAPI component.
+"""
+
+import asyncio
+import importlib.util
+import json
+import types
+import unittest
+from unittest import mock
+
+try:
+    from galaxy_code_review import bitbucket_api
+    from galaxy_code_review.bitbucket_api import BitbucketAPI
+except ImportError:
+    BitbucketAPI = None
+
+
+CONFIG = {
+    'bitbucket': {
+        'username': 'user',
+        'app_password': 'password',
+        'api_url': 'https://api.bitbucket.org/2.0/'
+    }
+}
+
+
+@unittest.skipIf(BitbucketAPI is None, "requests is not installed")
+class TestBitbucketAPI(unittest.TestCase):
+    """Test cases for the BitbucketAPI class."""
+
+    def setUp(self):
+        """Set up a client whose HTTP session is replaced by a fake."""
+        self.api = BitbucketAPI(CONFIG)
+        self.addCleanup(self.api.close)
+        self.requests = []
+        self.responses = []
+
+        def request(method, url, **kwargs):
+            self.requests.append(kwargs)
+            return self.responses.pop(0)
+        self.api._session = types.SimpleNamespace(request=request, close=lambda: None)
+
+    def _response(self, status_code, content=b'', etag=None):
+        """Build a fake requests response."""
+        return types.SimpleNamespace(
+            status_code=status_code,
+            content=content,
+            text=content.decode('utf-8'),
+            headers={'ETag': etag} if etag else {},
+            json=lambda: json.loads(content),
+            raise_for_status=lambda: None
+        )
+
+    def test_not_modified_response_returns_cached_body(self):
+        """Test that a cached GET is revalidated with its ETag and a 304 reuses the body."""
+        self.responses = [
+            self._response(200, b'{"id": 1, "title": "Fix"}', etag='"v1"'),
+            self._response(304)
+        ]
+
+        first = self.api.get_pull_request('workspace/repo', 1)
+        second = self.api.get_pull_request('workspace/repo', 1)
+
+        self.assertIsNone(self.requests[0]['headers'])
+        self.assertEqual(self.requests[1]['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(first, {'id': 1, 'title': 'Fix'})
+        self.assertEqual(second, first)
+
+    def test_response_without_etag_expires(self):
+        """Test that a cached GET without an ETag is reused only until it expires."""
+        self.responses = [self._response(200, b'print(1)\n'), self._response(200, b'print(2)\n')]
+
+        with mock.patch.object(bitbucket_api.time, 'monotonic', side_effect=[0.0, 1.0, 1.0 + bitbucket_api.GET_CACHE_TTL, 100.0]):
+            first = self.api.get_file_content('workspace/repo', 'a.py', 'feature')
+            second = self.api.get_file_content('workspace/repo', 'a.py', 'feature')
+            third = self.api.get_file_content('workspace/repo', 'a.py', 'feature')
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(second, first)
+        self.assertEqual(third, 'print(2)\n')
+
+    @unittest.skipIf(importlib.util.find_spec('httpx') is None, "httpx is not installed")
+    def test_async_requests_share_the_get_cache(self):
+        """Test that an async GET revalidates the response cached by a sync one."""
+        self.responses = [self._response(200, b'{"id": 1}', etag='"v1"'), self._response(304)]
+
+        async def request(method, url, **kwargs):
+            self.requests.append(kwargs)
+            return self.responses.pop(0)
+        self.api._aclient = types.SimpleNamespace(request=request)
+        self.api._arequest_slots = asyncio.Semaphore(1)
+
+        first = self.api.get_pull_request('workspace/repo', 1)
+        second = asyncio.run(self.api.aget_pull_request('workspace/repo', 1))
+
+        self.assertEqual(self.requests[1]['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(second, first)
+
+
+if __name__ == '__main__':
+    unittest.main()
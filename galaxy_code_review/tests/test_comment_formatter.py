@@ -0,0 +1,71 @@
+"""
+Tests for the CommentFormatter component.
+"""
+
+import unittest
+from galaxy_code_review.comment_formatter import CommentFormatter
+
+
+class TestCommentFormatter(unittest.TestCase):
+    """Test cases for the CommentFormatter class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.formatter = CommentFormatter()
+
+    def test_format_comment(self):
+        """Test formatting a complete review comment."""
+        result = self.formatter.format_list([{
+            'line': 12,
+            'content': 'Possible SQL injection.',
+            'severity': 'error',
+            'category': 'security',
+            'file_path': 'app/db.py'
+        }])
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(
+            result[0]['content']['raw'],
+            '🛑 Error 🔒 **Security**\n\nPossible SQL injection.'
+        )
+        self.assertEqual(result[0]['inline'], {'path': 'app/db.py', 'to': 12})
+
+    def test_defaults_and_case_insensitivity(self):
+        """Test default severity and case-insensitive lookups."""
+        result = self.formatter.format_list([
+            {'line': 1, 'content': 'a'},
+            {'line': 2, 'content': 'b', 'severity': 'WARNING', 'category': 'Bug'}
+        ])
+
+        self.assertEqual(result[0]['content']['raw'], '💡 Info **General**\n\na')
+        self.assertEqual(result[1]['content']['raw'], '⚠️ Warning 🐛 **Bug**\n\nb')
+
+    def test_unknown_category(self):
+        """Test that unknown categories are capitalized."""
+        result = self.formatter.format_list([
+            {'line': 3, 'content': 'c', 'category': 'error-handling'}
+        ])
+
+        self.assertEqual(result[0]['content']['raw'], '💡 Info **Error-handling**\n\nc')
+
+    def test_skip_incomplete_comments(self):
+        """Test that comments missing required fields are skipped."""
+        result = self.formatter.format_list([
+            {'content': 'no line'},
+            {'line': 4},
+            {'line': 5, 'content': 'ok'}
+        ])
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['inline']['to'], 5)
+
+    def test_format_is_lazy(self):
+        """Test that format returns an iterator over formatted comments."""
+        result = self.formatter.format([{'line': 6, 'content': 'd'}])
+
+        self.assertFalse(isinstance(result, list))
+        self.assertEqual([c['inline']['to'] for c in result], [6])
+
+
+if __name__ == '__main__':
+    unittest.main()
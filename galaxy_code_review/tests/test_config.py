@@ -0,0 +1,131 @@
+"""
+Tests for configuration loading.
+"""
+
+import os
+import tempfile
+import unittest
+
+from galaxy_code_review.config import load_config, _parse_config, tomllib
+
+
+VALID_CONFIG = """bitbucket:
+  username: "user"
+  app_password: "password"
+  api_url: "https://api.bitbucket.org/2.0/"
+
+reviewer:
+  model: "gpt-4"
+  temperature: 0.2
+"""
+
+VALID_TOML_CONFIG = """[bitbucket]
+username = "user"
+app_password = "password"
+api_url = "https://api.bitbucket.org/2.0/"
+
+[reviewer]
+model = "gpt-4"
+temperature = 0.2
+"""
+
+
+class TestLoadConfig(unittest.TestCase):
+    """Test cases for load_config."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        fd, self.config_path = tempfile.mkstemp(suffix='.yaml')
+        with os.fdopen(fd, 'w') as f:
+            f.write(VALID_CONFIG)
+
+    def tearDown(self):
+        """Remove the temporary configuration file."""
+        os.remove(self.config_path)
+
+    def test_load_valid_config(self):
+        """Test loading a valid configuration file."""
+        config = load_config(self.config_path)
+
+        self.assertEqual(config['bitbucket']['username'], 'user')
+        self.assertEqual(config['reviewer']['model'], 'gpt-4')
+
+    def test_missing_file(self):
+        """Test that a missing file raises FileNotFoundError."""
+        with self.assertRaises(FileNotFoundError):
+            load_config(self.config_path + '.missing')
+
+    def test_repeated_load_is_cached(self):
+        """Test that an unchanged file is only parsed once."""
+        first = load_config(self.config_path)
+        hits = _parse_config.cache_info().hits
+        second = load_config(self.config_path)
+
+        self.assertEqual(_parse_config.cache_info().hits, hits + 1)
+        self.assertEqual(first, second)
+
+    def test_cached_config_is_not_shared(self):
+        """Test that mutating a loaded config does not affect later loads."""
+        first = load_config(self.config_path)
+        first['bitbucket']['username'] = 'changed'
+
+        second = load_config(self.config_path)
+
+        self.assertEqual(second['bitbucket']['username'], 'user')
+
+    def test_modified_file_is_reloaded(self):
+        """Test that a modified file is parsed again."""
+        load_config(self.config_path)
+
+        with open(self.config_path, 'a') as f:
+            f.write("\nextra: true\n")
+
+        config = load_config(self.config_path)
+
+        self.assertTrue(config['extra'])
+
+    def test_missing_section(self):
+        """Test that a missing required section raises ValueError."""
+        with open(self.config_path, 'w') as f:
+            f.write("bitbucket:\n  username: user\n")
+
+        with self.assertRaises(ValueError):
+            load_config(self.config_path)
+
+    def test_config_that_is_not_a_mapping(self):
+        """Test that a document or section that isn't a mapping raises ValueError."""
+        for content in ("- a\n- b\n", "", "bitbucket: user\nreviewer: [gpt-4]\n"):
+            with open(self.config_path, 'w') as f:
+                f.write(content)
+
+            with self.assertRaisesRegex(ValueError, 'must be a mapping'):
+                load_config(self.config_path)
+
+    def test_missing_fields_are_all_reported(self):
+        """Test that every missing field in a section is named in the error."""
+        with open(self.config_path, 'w') as f:
+            f.write("bitbucket:\n  username: user\nreviewer:\n  model: gpt-4\n  temperature: 0\n")
+
+        with self.assertRaisesRegex(ValueError, 'api_url, app_password'):
+            load_config(self.config_path)
+
+
+@unittest.skipIf(tomllib is None, "TOML support is not available")
+class TestLoadTomlConfig(unittest.TestCase):
+    """Test cases for loading TOML configuration files."""
+
+    def test_load_toml_config(self):
+        """Test that .toml files are parsed as TOML."""
+        fd, config_path = tempfile.mkstemp(suffix='.toml')
+        with os.fdopen(fd, 'w') as f:
+            f.write(VALID_TOML_CONFIG)
+        self.addCleanup(os.remove, config_path)
+
+        config = load_config(config_path)
+
+        self.assertEqual(config['bitbucket']['username'], 'user')
+        self.assertEqual(config['reviewer']['temperature'], 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
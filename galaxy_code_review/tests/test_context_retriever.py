@@ -0,0 +1,70 @@
+"""
+Tests for the ContextRetriever component.
+"""
+
+import types
+import unittest
+
+try:
+    from galaxy_code_review.context_retriever import ContextRetriever
+except ImportError:
+    # The retriever needs requests through BitbucketAPI
+    ContextRetriever = None
+
+
+LISTINGS = {
+    'pkg': ['pkg/parser.py', 'pkg/util.py'],
+    '': ['README.md', 'test_parser.js', 'test_parser.py', 'parser_test.go'],
+    'tests': ['tests/parser_test.py', 'tests/test_parser.ts', 'tests/test_parser.java']
+}
+
+
+@unittest.skipIf(ContextRetriever is None, "requests is not installed")
+class TestContextRetriever(unittest.TestCase):
+    """Test cases for the ContextRetriever class."""
+
+    def setUp(self):
+        """Set up a retriever backed by a fake Bitbucket API."""
+        self.listed = []
+        self.fetched = []
+
+        def list_directory(repo_slug, directory_path, ref=None):
+            self.listed.append(directory_path)
+            if directory_path not in LISTINGS:
+                raise Exception("Not found")
+            return LISTINGS[directory_path]
+
+        def get_file_content(repo_slug, file_path, ref=None):
+            self.fetched.append(file_path)
+            return f"# {file_path}\n"
+
+        self.retriever = ContextRetriever(types.SimpleNamespace(
+            list_directory=list_directory,
+            get_file_content=get_file_content
+        ))
+
+    def test_related_files_are_found_from_directory_listings(self):
+        """Test that siblings and test files are found by listing each directory once."""
+        related = self.retriever._find_related_files('workspace/repo', 'feature', 'pkg/parser.py')
+
+        self.assertEqual(sorted(self.listed), ['', 'pkg', 'tests'])
+        self.assertEqual(list(related), [
+            'pkg/util.py',
+            'test_parser.py',
+            'parser_test.go',
+            'tests/parser_test.py',
+            'tests/test_parser.ts'
+        ])
+        self.assertEqual(related['test_parser.py'], '# test_parser.py\n')
+        self.assertNotIn('README.md', self.fetched)
+
+    def test_missing_directories_are_listed_once(self):
+        """Test that a directory that can't be listed is cached as empty."""
+        self.retriever._list_directory('workspace/repo', 'feature', 'missing')
+
+        self.assertEqual(self.retriever._list_directory('workspace/repo', 'feature', 'missing'), [])
+        self.assertEqual(self.listed, ['missing'])
+
+
+if __name__ == '__main__':
+    unittest.main()
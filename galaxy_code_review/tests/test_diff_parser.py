@@ -102,6 +102,95 @@ index 1234567..abcdefg 100644
         self.assertIn('deletion', change_types)
         self.assertIn('addition', change_types)
 
+    
+    def test_parse_line_iterable(self):
+        """Test parsing a diff supplied as an iterable of lines."""
+        diff = """diff --git a/file.py b/file.py
+index 1234567..abcdefg 100644
+--- a/file.py
++++ b/file.py
+@@ -10,6 +10,7 @@ def existing_function():
+     return True
+ 
+ # New function added
++def new_function():
+     return False
+ """
+        expected = self.parser.parse(diff)
+        result = self.parser.parse(iter(diff.split('\n')))
+        
+        self.assertEqual(result, expected)
+    
+    def test_parse_line_iterable_with_form_feed(self):
+        """Test that only newlines end lines of a diff supplied as lines."""
+        diff = "diff --git a/file.py b/file.py\n--- a/file.py\n+++ b/file.py\n@@ -1,2 +1,4 @@\n x = 1\n+y = '\x0c'\n+z = '\x85'\n x = 2\n"
+        
+        self.assertEqual(self.parser.parse(iter(diff.split('\n'))), self.parser.parse(diff))
+        self.assertEqual(self.parser.parse(diff)['file.py'][0]['end_line'], 3)
+
+    
+    def test_skip_binary_file(self):
+        """Test that binary files are skipped but text files are kept."""
+        diff = """diff --git a/image.png b/image.png
+index 1234567..abcdefg 100644
+Binary files a/image.png and b/image.png differ
+diff --git a/notes.txt b/notes.txt
+index 1234567..abcdefg 100644
+--- a/notes.txt
++++ b/notes.txt
+@@ -1,1 +1,2 @@
+ Notes
++Binary files are not reviewed.
+"""
+        result = self.parser.parse(diff)
+        
+        self.assertNotIn('image.png', result)
+        self.assertIn('notes.txt', result)
+        self.assertEqual(result['notes.txt'][0]['content'], 'Binary files are not reviewed.')
+
+    def test_parse_iter(self):
+        """Test that parse_iter lazily yields (file_path, change) pairs in diff order."""
+        diff = """diff --git a/a.py b/a.py
+index 1234567..abcdefg 100644
+--- a/a.py
++++ b/a.py
+@@ -1,2 +1,2 @@
+-old
++new
+ same
+diff --git a/b.py b/b.py
+index 1234567..abcdefg 100644
+--- a/b.py
++++ b/b.py
+@@ -1,1 +1,2 @@
+ same
++added
+"""
+        result = self.parser.parse_iter(diff)
+        
+        self.assertNotIsInstance(result, list)
+        self.assertEqual(
+            [(path, change['type']) for path, change in result],
+            [('a.py', 'deletion'), ('a.py', 'addition'), ('b.py', 'addition')]
+        )
+        self.assertEqual(list(self.parser.parse_iter('')), [])
+
+    def test_parse_iter_streams_files(self):
+        """Test that a line iterable is consumed one file at a time."""
+        lines = iter([
+            'diff --git a/a.py b/a.py',
+            '@@ -1,1 +1,1 @@',
+            '+new',
+            'diff --git a/b.py b/b.py',
+            '@@ -1,1 +1,1 @@',
+            '+other'
+        ])
+        
+        file_path, change = next(self.parser.parse_iter(lines))
+        
+        self.assertEqual((file_path, change['content']), ('a.py', 'new'))
+        self.assertEqual(next(lines), '@@ -1,1 +1,1 @@')
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
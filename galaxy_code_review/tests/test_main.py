@@ -0,0 +1,73 @@
+"""
+Tests for the review pipeline helpers in main.
+"""
+
+import types
+import unittest
+
+from galaxy_code_review.comment_formatter import CommentFormatter
+from galaxy_code_review.main import DEFAULT_EXCLUDE, batch_files, is_excluded, review_files
+
+
+def changed(size):
+    """Build the changes of a file with size characters of changed content."""
+    return [{'type': 'addition', 'start_line': 1, 'end_line': 1, 'content': 'x' * size}]
+
+
+class TestIsExcluded(unittest.TestCase):
+    """Test cases for is_excluded."""
+
+    def test_patterns_match_full_path_and_file_name(self):
+        """Test that patterns match either the whole path or the file name."""
+        patterns = DEFAULT_EXCLUDE + ('docs/*', 'generated_*.py')
+
+        self.assertTrue(is_excluded('web/package-lock.json', patterns))
+        self.assertTrue(is_excluded('static/app.min.js', patterns))
+        self.assertTrue(is_excluded('docs/index.md', patterns))
+        self.assertTrue(is_excluded('pkg/generated_models.py', patterns))
+        self.assertFalse(is_excluded('pkg/models.py', patterns))
+        self.assertFalse(is_excluded('web/docs/index.md', ('docs/*',)))
+
+
+class TestBatchFiles(unittest.TestCase):
+    """Test cases for batch_files."""
+
+    def test_files_are_split_by_changed_size(self):
+        """Test that batches are closed before they exceed the size limit."""
+        files = [('a.py', changed(40)), ('b.py', changed(50)), ('c.py', changed(200)), ('d.py', changed(10))]
+
+        batches = [[file_path for file_path, _ in batch] for batch in batch_files(files, 100)]
+
+        self.assertEqual(batches, [['a.py', 'b.py'], ['c.py'], ['d.py']])
+
+    def test_zero_limit_reviews_files_alone(self):
+        """Test that a limit of 0 puts every file in its own batch."""
+        files = [('a.py', changed(1)), ('b.py', changed(1))]
+
+        self.assertEqual(len(list(batch_files(files, 0))), 2)
+
+
+class TestReviewFiles(unittest.TestCase):
+    """Test cases for review_files."""
+
+    def test_batched_comments_are_posted_on_their_files(self):
+        """Test that each comment of a batch is anchored to its own file."""
+        posted = []
+        bitbucket_api = types.SimpleNamespace(
+            post_comments=lambda repo_slug, pr_id, comments: posted.extend(comments)
+        )
+        context_retriever = types.SimpleNamespace(get_context=lambda repo_slug, pr_info, file_path: {})
+        reviewer_agent = types.SimpleNamespace(review_batch=lambda files: {
+            file_path: [{'line': 2, 'content': f'Check {file_path}.'}]
+            for file_path, _, _ in files
+        })
+
+        review_files('workspace/repo', 1, {}, [('a.py', []), ('b.py', [])],
+                     bitbucket_api, context_retriever, reviewer_agent, CommentFormatter())
+
+        self.assertEqual([comment['inline'] for comment in posted],
+                         [{'path': 'a.py', 'to': 2}, {'path': 'b.py', 'to': 2}])
+
+
+if __name__ == '__main__':
+    unittest.main()
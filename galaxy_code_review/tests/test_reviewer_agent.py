@@ -0,0 +1,358 @@
+"""
+Tests for the ReviewerAgent component.
+"""
+
+import asyncio
+import types
+import unittest
+from unittest import mock
+from galaxy_code_review import reviewer_agent
+from galaxy_code_review.reviewer_agent import ReviewerAgent
+
+
+CONFIG = {
+    'reviewer': {
+        'model': 'gpt-4',
+        'temperature': 0.2
+    }
+}
+
+CHANGES = [
+    {
+        'type': 'addition',
+        'start_line': 3,
+        'end_line': 3,
+        'content': 'return None'
+    }
+]
+
+
+class TestReviewerAgent(unittest.TestCase):
+    """Test cases for the ReviewerAgent class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.agent = ReviewerAgent(CONFIG)
+        # Review as if an API key and the OpenAI SDK were available
+        self.agent._enabled = True
+        self.prompts = []
+
+    def _respond_with(self, response):
+        """Replace the LLM call with one that records the prompt and returns response."""
+        def get_llm_review(prompt, max_tokens, batch=False):
+            self.prompts.append(prompt)
+            return response
+        self.agent._get_llm_review = get_llm_review
+
+    def test_review_batch_routes_comments_by_file(self):
+        """Test that a batch is reviewed in one request and comments are routed by file."""
+        self._respond_with('''[
+            {"file": "b.py", "line": 3, "content": "Returns None."},
+            {"file": "unknown.py", "line": 1, "content": "Dropped."}
+        ]''')
+
+        result = self.agent.review_batch([
+            ('a.py', CHANGES, {}),
+            ('b.py', CHANGES, {}),
+            ('c.py', [], {})
+        ])
+
+        self.assertEqual(len(self.prompts), 1)
+        self.assertEqual(result['a.py'], [])
+        self.assertEqual(result['b.py'], [{
+            'line': 3,
+            'content': 'Returns None.',
+            'severity': 'info',
+            'category': 'general'
+        }])
+        self.assertNotIn('c.py', result)
+
+    def test_review_batch_accepts_comments_keyed_by_file(self):
+        """Test that a batch response keyed by file path is routed by file."""
+        self._respond_with('{"a.py": [{"line": 3, "content": "Returns None."}], "b.py": []}')
+
+        result = self.agent.review_batch([('a.py', CHANGES, {}), ('b.py', CHANGES, {})])
+
+        self.assertEqual(result['a.py'][0]['content'], 'Returns None.')
+        self.assertNotIn('file', result['a.py'][0])
+        self.assertEqual(result['b.py'], [])
+
+    def test_review_batch_is_split_by_prompt_size(self):
+        """Test that a batch is split by prompt size and the description is sent once per request."""
+        self._respond_with('[]')
+        self.agent.batch_prompt_chars = 1000
+        context = {'file_content': 'x = 1\n' * 50, 'pr_description': 'Fix the parser'}
+
+        result = self.agent.review_batch([(f'{name}.py', CHANGES, context) for name in 'abcde'])
+
+        self.assertEqual(len(result), 5)
+        self.assertEqual(len(self.prompts), 3)
+        for prompt in self.prompts:
+            self.assertEqual(prompt.count('Fix the parser'), 1)
+            self.assertLess(len(prompt), len(reviewer_agent._BATCH_REVIEW_INSTRUCTIONS) + 1100)
+
+    def test_review_batch_single_file(self):
+        """Test that a batch of one file uses the single-file prompt."""
+        self._respond_with('[{"line": 3, "content": "Returns None."}]')
+
+        result = self.agent.review_batch([('a.py', CHANGES, {})])
+
+        self.assertEqual(len(self.prompts), 1)
+        self.assertIn('File: a.py', self.prompts[0])
+        self.assertEqual(result['a.py'][0]['line'], 3)
+
+    def test_review_disabled_without_api_key(self):
+        """Test that no prompt is built when the LLM is unavailable."""
+        self._respond_with('[{"line": 3, "content": "Returns None."}]')
+        self.agent._enabled = False
+
+        self.assertEqual(self.agent.review('a.py', CHANGES, {}), [])
+        self.assertEqual(self.agent.review_batch([('a.py', CHANGES, {}), ('b.py', CHANGES, {})]),
+                         {'a.py': [], 'b.py': []})
+        self.assertEqual(self.prompts, [])
+
+    def test_trivial_and_oversized_changes_are_not_reviewed(self):
+        """Test that whitespace-only and oversized changes are skipped without a request."""
+        self._respond_with('[{"line": 3, "content": "Returns None."}]')
+        self.agent.max_change_chars = 100
+        blank = [{'type': 'addition', 'start_line': 4, 'end_line': 5, 'content': '\n  \n'}]
+        oversized = [{'type': 'addition', 'start_line': 1, 'end_line': 1, 'content': 'x' * 101}]
+
+        self.assertEqual(self.agent.review('a.py', blank, {}), [])
+        self.assertEqual(self.agent.review_batch([('a.py', oversized, {}), ('b.py', CHANGES + blank, {})]),
+                         {'a.py': [], 'b.py': [{'line': 3, 'content': 'Returns None.',
+                                               'severity': 'info', 'category': 'general'}]})
+        self.assertEqual(len(self.prompts), 1)
+
+    def test_large_file_content_is_windowed(self):
+        """Test that only the lines around the changes of a large file are sent."""
+        self._respond_with('[]')
+        self.agent.context_lines = 2
+        self.agent.full_file_max_lines = 10
+        file_content = "\n".join(
+            "    def helper(self):" if n == 20 else f"line {n}" for n in range(1, 101)
+        )
+        changes = CHANGES + [
+            {'type': 'addition', 'start_line': 5, 'end_line': 5, 'content': 'x'},
+            {'type': 'addition', 'start_line': 50, 'end_line': 51, 'content': 'y'}
+        ]
+
+        self.agent.review('a.py', changes, {'file_content': file_content})
+
+        self.assertIn('Lines 1-7:', self.prompts[0])
+        self.assertIn('Lines 48-53:', self.prompts[0])
+        self.assertIn('line 53\n', self.prompts[0])
+        self.assertNotIn('line 54\n', self.prompts[0])
+        self.assertNotIn('line 30\n', self.prompts[0])
+        self.assertIn('- Line 20: def helper(self):', self.prompts[0])
+
+    def test_completion_params(self):
+        """Test that max_tokens scales with the changes and sampling settings are passed on."""
+        agent = ReviewerAgent({
+            'reviewer': dict(CONFIG['reviewer'], max_tokens=1000, top_p=0.9, seed=42)
+        })
+
+        small = agent._completion_params('prompt', agent._max_tokens_for(1))
+        large = agent._completion_params('prompt', agent._max_tokens_for(100))
+
+        self.assertLess(small['max_tokens'], large['max_tokens'])
+        self.assertEqual(large['max_tokens'], 1000)
+        self.assertEqual(small['top_p'], 0.9)
+        self.assertEqual(small['seed'], 42)
+        self.assertNotIn('presence_penalty', small)
+
+        agent.context_window = 1000
+        self.assertEqual(agent._max_tokens_for(100, 'x' * 2000), 244)
+        with self.assertRaises(ValueError):
+            agent._max_tokens_for(1, 'x' * 3000)
+
+    def test_prompt_larger_than_context_window_is_not_sent(self):
+        """Test that no request is made when the prompt leaves no room to respond."""
+        self._respond_with('[{"line": 3, "content": "Returns None."}]')
+        self.agent.context_window = 100
+
+        self.assertEqual(self.agent.review('a.py', CHANGES, {'file_content': 'x = 1\n' * 100}), [])
+        self.assertEqual(self.prompts, [])
+
+    def test_structured_output(self):
+        """Test that structured output requests a schema and its response is parsed."""
+        agent = ReviewerAgent({'reviewer': dict(CONFIG['reviewer'], structured_output=True)})
+
+        single = agent._completion_params('prompt', 100)
+        batch = agent._completion_params('prompt', 100, batch=True)
+        result = agent._parse_llm_response('{"comments": [{"line": 3, "content": "Returns None."}]}')
+
+        self.assertEqual(single['response_format']['type'], 'json_schema')
+        self.assertIn('file', batch['response_format']['json_schema']['schema']['properties']['comments']['items']['properties'])
+        self.assertEqual(result[0]['line'], 3)
+        self.assertNotIn('file', result[0])
+        self.assertNotIn('response_format', self.agent._completion_params('prompt', 100))
+
+    def test_parse_response_with_surrounding_prose(self):
+        """Test that the comment array is found among bracketed prose."""
+        result = self.agent._parse_llm_response(
+            'Review [draft]:\n[{"line": 3, "content": "Use list[int]."}, "line", {"line": 4}]\nSee [1].'
+        )
+
+        self.assertEqual(result, [{
+            'line': 3,
+            'content': 'Use list[int].',
+            'severity': 'info',
+            'category': 'general'
+        }])
+
+    def test_parse_response_with_object_before_array(self):
+        """Test that an object in the explanation doesn't hide the comment array."""
+        result = self.agent._parse_llm_response(
+            'Each comment looks like {"line": 1, "notes": []}:\n[{"line": 3, "content": "Returns None."}]'
+        )
+        keyed = self.agent._parse_llm_response(
+            'Here you go: {"a.py": [{"line": 3, "content": "Returns None."}]}'
+        )
+
+        self.assertEqual(result[0]['content'], 'Returns None.')
+        self.assertEqual(keyed[0]['file'], 'a.py')
+
+    def test_review_many_limits_concurrency(self):
+        """Test that review_many reviews every file with bounded concurrency."""
+        active = []
+        peak = []
+
+        async def aget_llm_review(prompt, max_tokens):
+            active.append(prompt)
+            peak.append(len(active))
+            await asyncio.sleep(0)
+            active.remove(prompt)
+            return '[{"line": 3, "content": "Returns None."}]'
+        self.agent._aget_llm_review = aget_llm_review
+
+        files = [(f'{name}.py', CHANGES, {}) for name in 'abcde']
+        result = asyncio.run(self.agent.review_many(files, max_concurrency=2))
+
+        self.assertEqual(list(result), ['a.py', 'b.py', 'c.py', 'd.py', 'e.py'])
+        self.assertTrue(all(comments[0]['line'] == 3 for comments in result.values()))
+        self.assertEqual(max(peak), 2)
+
+    def test_concurrency_limit_is_shared_by_agents(self):
+        """Test that the limit on LLM requests applies across agents."""
+        ReviewerAgent.set_concurrency(2)
+        self.addCleanup(ReviewerAgent.set_concurrency, reviewer_agent.DEFAULT_MAX_CONCURRENT_REQUESTS)
+        active = []
+        peak = []
+
+        async def create(**params):
+            active.append(params)
+            peak.append(len(active))
+            await asyncio.sleep(0)
+            active.remove(params)
+            message = types.SimpleNamespace(content='[]')
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message, finish_reason='stop')])
+        client = types.SimpleNamespace(chat=types.SimpleNamespace(
+            completions=types.SimpleNamespace(create=create)
+        ))
+
+        agents = [ReviewerAgent(CONFIG) for _ in range(4)]
+        for agent in agents:
+            agent._get_async_client = lambda openai: client
+
+        async def review_all():
+            await asyncio.gather(*(agent._aget_llm_review('prompt', 100) for agent in agents))
+
+        with mock.patch.object(reviewer_agent, '_get_openai', return_value=object()):
+            asyncio.run(review_all())
+
+        self.assertEqual(len(peak), 4)
+        self.assertEqual(max(peak), 2)
+
+    def test_shared_client_is_closed_with_its_last_agent(self):
+        """Test that the shared client stays open until every agent using it is closed."""
+        clients = []
+
+        class FakeClient:
+            def __init__(self, **kwargs):
+                self.closed = False
+                clients.append(self)
+
+            def close(self):
+                self.closed = True
+        openai = types.SimpleNamespace(OpenAI=FakeClient, DefaultHttpxClient=lambda **kwargs: None)
+        config = {'reviewer': dict(CONFIG['reviewer'], api_key='shared-key')}
+
+        with mock.patch.object(reviewer_agent, '_get_openai', return_value=openai), \
+                mock.patch.object(reviewer_agent, '_llm_connection_limits'):
+            other = ReviewerAgent(config)
+            with ReviewerAgent(config) as agent:
+                first = reviewer_agent._get_openai_client(agent.api_key, agent.max_retries)
+            agent.close()
+            self.assertFalse(first.closed)
+
+            other.close()
+            second = reviewer_agent._get_openai_client(agent.api_key, agent.max_retries)
+            reviewer_agent._release_openai_client(agent.api_key, agent.max_retries)
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(clients), 2)
+
+    def test_async_clients_are_closed(self):
+        """Test that aclose and moving to another event loop close the async client."""
+        clients = []
+
+        class FakeAsyncClient:
+            def __init__(self, **kwargs):
+                self.closed = False
+                clients.append(self)
+
+            async def close(self):
+                self.closed = True
+        openai = types.SimpleNamespace(AsyncOpenAI=FakeAsyncClient, DefaultAsyncHttpxClient=lambda **kwargs: None)
+
+        async def use_client():
+            self.agent._get_async_client(openai)
+            await asyncio.sleep(0)
+
+        with mock.patch.object(reviewer_agent, '_llm_connection_limits'):
+            asyncio.run(use_client())
+            asyncio.run(use_client())
+            self.assertEqual([client.closed for client in clients], [True, False])
+
+            asyncio.run(self.agent.aclose())
+
+        self.assertTrue(clients[1].closed)
+        self.assertIsNone(self.agent._async_client)
+
+    def test_identical_requests_use_cached_response(self):
+        """Test that a cached response is returned without calling the LLM again."""
+        class FakeCache(dict):
+            def set(self, key, value, expire=None):
+                self[key] = value
+        self.agent._response_cache = FakeCache()
+        calls = []
+
+        def create(**params):
+            calls.append(params)
+            message = types.SimpleNamespace(content='[]')
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message, finish_reason='stop')])
+        client = types.SimpleNamespace(chat=types.SimpleNamespace(
+            completions=types.SimpleNamespace(create=create)
+        ))
+
+        with mock.patch.object(reviewer_agent, '_get_openai', return_value=object()), \
+                mock.patch.object(reviewer_agent, '_get_openai_client', return_value=client):
+            first = self.agent._get_llm_review('prompt', 100)
+            second = self.agent._get_llm_review('prompt  \r', 100)
+            self.agent._get_llm_review('other prompt', 100)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 2)
+
+    def test_token_bucket_delays_requests_over_the_rate(self):
+        """Test that tokens beyond the per-minute limit are delayed."""
+        bucket = reviewer_agent._TokenBucket(600)
+
+        self.assertEqual(bucket.reserve(500), 0.0)
+        self.assertAlmostEqual(bucket.reserve(200), 10.0, delta=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
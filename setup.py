@@ -29,8 +29,23 @@ setup(
     install_requires=[
         "requests>=2.25.0",
         "pyyaml>=5.4.0",
-        "openai>=0.27.0",
+        "openai>=1.17.0",
     ],
+    extras_require={
+        "speedups": [
+            "orjson>=3.0.0",
+            "google-re2>=1.0",
+        ],
+        "async": [
+            "httpx[http2]>=0.23.0",
+        ],
+        "toml": [
+            "tomli>=1.1.0; python_version < '3.11'",
+        ],
+        "cache": [
+            "diskcache>=5.0.0",
+        ],
+    },
     entry_points={
         "console_scripts": [
             "galaxy-review=galaxy_code_review.main:main",